@@ -0,0 +1,127 @@
+"""Synthetic Mudae embed descriptions for the parser benchmarks.
+
+Every generator returns the description and how many entries (characters, bundles, pins) it holds.
+"""
+
+from __future__ import annotations
+
+import random
+import string
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+SIZES = (15, 500, 2000, 4000, 8100, 32000)
+EMOJIS = ("", "", "", " ⭐", " ❌", " 🔐", " ✅", "​")
+
+
+def random_word(rng: random.Random) -> str:
+    return rng.choice(string.ascii_uppercase) + "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+
+
+def random_name(rng: random.Random) -> str:
+    return f"{' '.join(random_word(rng) for _ in range(rng.randint(1, 3)))} - {random_word(rng)}"
+
+
+def character_name(rng: random.Random, exclusions: list[str]) -> str:
+    if exclusions and rng.random() < 0.05:
+        return rng.choice(exclusions)
+    return " ".join(random_word(rng) for _ in range(rng.randint(1, 3)))
+
+
+def build(size: int, header: str, line: Callable[[int], str]) -> tuple[str, int]:
+    lines = [header] if header else []
+    length = len(header)
+    count = 0
+    while length < size or not count:
+        count += 1
+        text = line(count)
+        lines.append(text)
+        length += len(text) + 1
+    return "\n".join(lines), count
+
+
+def mm_header(rng: random.Random) -> str:
+    return (
+        f"**AVG: {rng.randint(50, 400)}**\n*{rng.randint(0, 20)} $wa, {rng.randint(0, 20)} $ha, "
+        f"{rng.randint(0, 5)} $wg, {rng.randint(0, 5)} $hg*\n\n"
+    )
+
+
+def mm(size: int, rng: random.Random, exclusions: list[str]) -> tuple[str, int]:
+    def line(count: int) -> str:
+        name = character_name(rng, exclusions)
+        suffix = rng.choice(
+            (
+                f" · **{rng.randint(30, 900)}** ka",
+                f" <:kakera:469835869059153940> **{rng.randint(30, 900)}**",
+                f" 💞 => {random_word(rng)}",
+                " 🚫 $wl",
+                "",
+            )
+        )
+        return f"#{count} - {name}{rng.choice(EMOJIS)}{suffix}"
+
+    return build(size, mm_header(rng), line)
+
+
+def mmn(size: int, rng: random.Random, exclusions: list[str]) -> tuple[str, int]:
+    notes = [" ".join(random_word(rng) for _ in range(rng.randint(1, 4))) for _ in range(8)]
+    return build(size, mm_header(rng), lambda _: f"{character_name(rng, exclusions)} | {rng.choice(notes)}")
+
+
+def mmec(size: int, rng: random.Random, exclusions: list[str]) -> tuple[str, int]:
+    colors = [f"{rng.randrange(0xFFFFFF):06x}" for _ in range(8)]
+    return build(
+        size,
+        mm_header(rng),
+        lambda _: f"{character_name(rng, exclusions)} · **{rng.randint(30, 900)}** ka (#{rng.choice(colors)})",
+    )
+
+
+def mmsk(size: int, rng: random.Random, exclusions: list[str]) -> tuple[str, int]:
+    return build(size, mm_header(rng), lambda _: f"{character_name(rng, exclusions)} (Soulkeys: **{rng.randint(0, 40)}**)")
+
+
+def ail(size: int, rng: random.Random, exclusions: list[str]) -> tuple[str, int]:
+    names = [character_name(rng, exclusions) for _ in range(max(1, size // 400))]
+    return build(
+        size,
+        "",
+        lambda _: (
+            f"{rng.choice(names)} - https://mudae.net/uploads/{rng.randint(10**6, 10**7)}/"
+            f"{''.join(rng.choices(string.ascii_letters, k=12))}.png"
+        ),
+    )
+
+
+def dl(size: int, rng: random.Random, exclusions: list[str]) -> tuple[str, int]:
+    header = f"**{rng.randint(1, 900)} disabled ({rng.randint(1, 90000)} $wa, {rng.randint(1, 90000)} $ha)**"
+    return build(
+        size,
+        header,
+        lambda _: (
+            f"**{' '.join(random_word(rng) for _ in range(rng.randint(1, 4)))}** ({rng.randint(1, 900)} $wa,"
+            f" {rng.randint(1, 900)} $ha)"
+        ),
+    )
+
+
+def pinlist(size: int, rng: random.Random, exclusions: list[str]) -> tuple[str, int]:
+    return build(size, "", lambda count: f"<:unkn:{rng.randint(10**17, 10**18 - 1)}> · pin{count}")
+
+
+CORPORA: dict[str, Callable[[int, random.Random, list[str]], tuple[str, int]]] = {
+    "mm": mm,
+    "mmn": mmn,
+    "mmec": mmec,
+    "mmsk": mmsk,
+    "ail": ail,
+    "dl": dl,
+    "pinlist": pinlist,
+}
+
+
+def generate(kind: str, size: int, exclusions: list[str], seed: int = 0) -> tuple[str, int]:
+    return CORPORA[kind](size, random.Random(f"{kind}-{size}-{seed}"), exclusions)
@@ -0,0 +1,43 @@
+"""Compare the old per-entry replace loop with the compiled exclusion matcher.
+
+Run from the repo root (needs config.toml): python -m benchmarks.exclusions
+"""
+
+from __future__ import annotations
+
+import random
+import timeit
+
+from benchmarks.corpus import random_name
+from cogs.regex import trie_pattern
+
+
+def replace_loop(text: str, exclusions: list[str]) -> str:
+    for i in exclusions:
+        text = text.replace(i, i.replace("-", "&45;"))
+    return text
+
+
+def main() -> None:
+    rng = random.Random(0)
+    exclusions = [random_name(rng) for _ in range(5000)]
+    lines = [f"#{i} - {rng.choice(exclusions) if i % 10 == 0 else random_name(rng)} · 120 ka" for i in range(1, 400)]
+    text = "\n".join(lines)
+
+    print(f"text: {len(text)} characters, {len(lines)} lines")
+    print(f"{'exclusions':>10} {'replace loop':>14} {'matcher':>10}")
+    for size in (10, 100, 1000, 5000):
+        subset = exclusions[:size]
+        pattern = trie_pattern(subset)
+        loop = min(timeit.repeat(lambda: replace_loop(text, subset), number=5, repeat=3)) / 5  # noqa: B023
+        matcher = (
+            min(
+                timeit.repeat(lambda: pattern.sub(lambda m: m[0].replace("-", "&45;"), text), number=5, repeat=3)  # noqa: B023
+            )
+            / 5
+        )
+        print(f"{size:>10} {loop * 1000:>11.3f} ms {matcher * 1000:>7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
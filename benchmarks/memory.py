@@ -0,0 +1,161 @@
+"""Memory the discord.py caches take under the full and lean profiles, replaying synthetic gateway payloads.
+
+Each profile runs in its own process: the guilds are created from GUILD_CREATE payloads shaped like the
+ones discord sends with that profile's intents (members and presences only with the privileged intents,
+the full member list like after chunking), then message creates fill the message cache. The RSS of the
+process before and after is compared.
+
+Run from the repo root:
+    python -m benchmarks.memory
+    python -m benchmarks.memory --guilds 2000 --members 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import subprocess
+import sys
+from typing import Any
+
+import discord
+import psutil
+
+from utils.profiles import cache_options
+
+PROFILES = ("full", "lean")
+BOT_ID = 10**17
+
+
+def snowflake(rng: random.Random) -> int:
+    return rng.randint(10**17 + 1, 10**18 - 1)
+
+
+def user(rng: random.Random, user_id: int) -> dict[str, Any]:
+    return {"id": str(user_id), "username": f"user{user_id % 10**6}", "discriminator": "0", "avatar": None}
+
+
+def member(rng: random.Random, user_id: int) -> dict[str, Any]:
+    return {
+        "user": user(rng, user_id),
+        "roles": [],
+        "joined_at": "2023-01-01T00:00:00+00:00",
+        "flags": 0,
+        "deaf": False,
+        "mute": False,
+    }
+
+
+def guild_payload(rng: random.Random, guild_id: int, members: int, channels: int, privileged: bool) -> dict[str, Any]:
+    member_ids = [snowflake(rng) for _ in range(members)]
+    payload: dict[str, Any] = {
+        "id": str(guild_id),
+        "name": f"guild {guild_id % 10**6}",
+        "owner_id": str(member_ids[0]),
+        "member_count": members + 1,
+        "roles": [{"id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0}],
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+        # one voice channel for every four text ones
+        "channels": [
+            {
+                "id": str(snowflake(rng)),
+                "type": 2,
+                "name": f"voice-{index}",
+                "position": index,
+                "bitrate": 64000,
+                "user_limit": 0,
+            }
+            if index % 5 == 4
+            else {"id": str(snowflake(rng)), "type": 0, "name": f"channel-{index}", "position": index}
+            for index in range(channels)
+        ],
+        # discord always sends the bot's own member
+        "members": [member(rng, BOT_ID)],
+    }
+    if privileged:
+        payload["members"] += [member(rng, member_id) for member_id in member_ids]
+        # roughly a fifth of a server is online
+        payload["presences"] = [
+            {"user": {"id": str(member_id)}, "status": "online", "activities": [], "client_status": {"desktop": "online"}}
+            for member_id in member_ids[: members // 5]
+        ]
+    return payload
+
+
+def measure(profile: str, guilds: int, members: int, channels: int, messages: int) -> dict[str, float]:
+    options = cache_options(profile)
+    client = discord.Client(**options)
+    state = client._connection
+    state.user = discord.ClientUser(state=state, data=user(random.Random(), BOT_ID))  # type: ignore
+    privileged = options["intents"].members
+    rng = random.Random(0)
+
+    gc.collect()
+    process = psutil.Process()
+    before = process.memory_info().rss
+    channel_ids = []
+    for _ in range(guilds):
+        payload = guild_payload(rng, snowflake(rng), members, channels, privileged)
+        guild = state._get_create_guild(payload)  # type: ignore
+        channel_ids.append((guild.id, payload["channels"][0]["id"]))
+    for index in range(messages):
+        guild_id, channel_id = rng.choice(channel_ids)
+        state.parse_message_create(
+            {
+                "id": str(snowflake(rng)),
+                "channel_id": channel_id,
+                "guild_id": str(guild_id),
+                "author": user(rng, snowflake(rng)),
+                "content": "$mm " + "x" * 200,
+                "timestamp": "2023-01-01T00:00:00+00:00",
+                "edited_timestamp": None,
+                "tts": False,
+                "mention_everyone": False,
+                "mentions": [],
+                "mention_roles": [],
+                "attachments": [],
+                "embeds": [],
+                "pinned": False,
+                "type": 0,
+                "nonce": str(index),
+            }
+        )
+    gc.collect()
+    after = process.memory_info().rss
+    return {
+        "mib": (after - before) / 1024**2,
+        "members": sum(len(guild._members) for guild in state._guilds.values()),
+        "messages": len(state._messages or ()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--guilds", type=int, default=1000)
+    parser.add_argument("--members", type=int, default=300)
+    parser.add_argument("--channels", type=int, default=30)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--profile", choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = (args.guilds, args.members, args.channels, args.messages)
+
+    if args.profile:  # one profile, in a process of its own
+        print(json.dumps(measure(args.profile, *sizes)))
+        return
+
+    print(f"{args.guilds} guilds, {args.members} members and {args.channels} channels each, {args.messages} messages")
+    print(f"{'profile':<8} {'cache rss':>10} {'members':>9} {'messages':>9}")
+    for profile in PROFILES:
+        command = [sys.executable, "-m", "benchmarks.memory", "--profile", profile]
+        for name, value in zip(("--guilds", "--members", "--channels", "--messages"), sizes, strict=True):
+            command += [name, str(value)]
+        result = json.loads(subprocess.run(command, capture_output=True, check=True, text=True).stdout)
+        print(f"{profile:<8} {result['mib']:>6.1f} MiB {result['members']:>9} {result['messages']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Latency of the full and fast palette modes and how far the fast palettes drift from the full ones.
+
+The distance is how far (euclidean, in RGB) each colour of one palette is from the closest colour of
+the other, averaged both ways, so 0 means both palettes hold the same colours.
+
+Run from the repo root:
+    python -m benchmarks.palettes
+    python -m benchmarks.palettes --max-pixels 60000 250000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import timeit
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from utils.palettes import PaletteMode, extract_palette
+
+# mudae's own images, a large custom image and a phone screenshot sized one
+SIZES = ((225, 350), (900, 1400), (2000, 3000))
+FORMATS = ("PNG", "JPEG", "GIF")
+
+
+def synthetic_image(size: tuple[int, int], fmt: str, seed: int = 0) -> bytes:
+    # a gradient under random shapes, blurred a bit so it has the smooth regions real art has
+    rng = random.Random(f"{size}-{fmt}-{seed}")
+    width, height = size
+    x = np.linspace(0, 1, width)[None, :]
+    y = np.linspace(0, 1, height)[:, None]
+    start, end = np.array([rng.randrange(256) for _ in range(3)]), np.array([rng.randrange(256) for _ in range(3)])
+    gradient = start + (end - start) * ((x + y) / 2)[..., None]
+    img = Image.fromarray(gradient.astype(np.uint8), "RGB")
+    draw = ImageDraw.Draw(img)
+    for _ in range(60):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        box = (x0, y0, x0 + rng.randrange(width // 2 + 1), y0 + rng.randrange(height // 2 + 1))
+        fill = tuple(rng.randrange(256) for _ in range(3))
+        (draw.ellipse if rng.random() < 0.5 else draw.rectangle)(box, fill=fill)
+    img = img.filter(ImageFilter.GaussianBlur(2))
+    buffer = BytesIO()
+    img.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def distance(palette: list[tuple[int, int, int]], other: list[tuple[int, int, int]]) -> float:
+    a, b = np.array(palette, dtype=float), np.array(other, dtype=float)
+    pairwise = np.linalg.norm(a[:, None] - b[None, :], axis=-1)
+    return float((pairwise.min(axis=1).mean() + pairwise.min(axis=0).mean()) / 2)
+
+
+def measure(data: bytes, mode: PaletteMode, max_pixels: int, repeat: int) -> tuple[float, list[tuple[int, int, int]]]:
+    seconds = min(timeit.repeat(lambda: extract_palette(BytesIO(data), mode, max_pixels), number=1, repeat=repeat))
+    return seconds, extract_palette(BytesIO(data), mode, max_pixels)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-pixels", nargs="+", type=int, default=[160000])
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'image':<16} {'mode':<12} {'time':>11} {'speedup':>8} {'distance':>9}")
+    for size in SIZES:
+        for fmt in args.formats:
+            data = synthetic_image(size, fmt)
+            full_seconds, full = measure(data, "full", 0, args.repeat)
+            label = f"{size[0]}x{size[1]} {fmt}"
+            print(f"{label:<16} {'full':<12} {full_seconds * 1000:>8.2f} ms {1:>7.1f}x {0:>9.2f}")
+            for max_pixels in args.max_pixels:
+                seconds, palette = measure(data, "fast", max_pixels, args.repeat)
+                mode = f"fast {max_pixels}"
+                print(
+                    f"{label:<16} {mode:<12} {seconds * 1000:>8.2f} ms {full_seconds / seconds:>7.1f}x"
+                    f" {distance(palette, full):>9.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
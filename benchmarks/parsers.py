@@ -0,0 +1,88 @@
+"""Throughput and peak memory of the harem list parsers over the synthetic corpus.
+
+Run from the repo root (needs config.toml):
+    python -m benchmarks.parsers
+    python -m benchmarks.parsers --save baseline.json
+    python -m benchmarks.parsers --compare baseline.json --tolerance 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from benchmarks.corpus import SIZES, generate
+from cogs.regex import EXCLUSION, dl_regex, ec_regex, image_regex, note_regex, pin_regex, regex, remove_sl_regex
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+PARSERS: dict[str, tuple[Callable[[str], list[str]], str]] = {
+    "regex": (regex, "mm"),
+    "remove_sl_regex": (remove_sl_regex, "mmsk"),
+    "note_regex": (note_regex, "mmn"),
+    "ec_regex": (ec_regex, "mmec"),
+    "image_regex": (image_regex, "ail"),
+    "dl_regex": (dl_regex, "dl"),
+    "pin_regex": (pin_regex, "pinlist"),
+}
+
+
+def measure(parser: Callable[[str], list[str]], text: str, count: int, repeat: int) -> dict[str, float]:
+    number = max(1, 20000 // len(text))
+    seconds = min(timeit.repeat(lambda: parser(text), number=number, repeat=repeat)) / number
+
+    tracemalloc.start()
+    parser(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "names_per_second": count / seconds, "peak_bytes": peak}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parsers", nargs="+", choices=PARSERS, default=list(PARSERS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", type=Path, help="write the results as json")
+    parser.add_argument("--compare", type=Path, help="json from a previous --save to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before failing, 0.2 = 20%%")
+    args = parser.parse_args()
+
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    print(f"{'parser':<16} {'size':>6} {'names':>6} {'time':>11} {'names/s':>12} {'peak':>10}")
+    for name in args.parsers:
+        func, kind = PARSERS[name]
+        for size in args.sizes:
+            text, count = generate(kind, size, EXCLUSION)
+            result = measure(func, text, count, args.repeat)
+            results.setdefault(name, {})[str(size)] = result
+            print(
+                f"{name:<16} {len(text):>6} {count:>6} {result['seconds'] * 1000:>8.3f} ms"
+                f" {result['names_per_second']:>12,.0f} {result['peak_bytes'] / 1024:>7.1f} KiB"
+            )
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+
+    if args.compare:
+        baseline: dict[str, dict[str, dict[str, float]]] = json.loads(args.compare.read_text())
+        regressions = [
+            f"{name} @ {size}: {old['seconds'] * 1000:.3f} ms -> {results[name][size]['seconds'] * 1000:.3f} ms"
+            for name, sizes in baseline.items()
+            for size, old in sizes.items()
+            if size in results.get(name, {}) and results[name][size]["seconds"] > old["seconds"] * (1 + args.tolerance)
+        ]
+        if regressions:
+            print("\nregressions:", *regressions, sep="\n  ")
+            sys.exit(1)
+        print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main()
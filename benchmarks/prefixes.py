@@ -0,0 +1,123 @@
+"""Messages per second through prefix matching on a replayed message stream.
+
+``before`` asks get_prefix for a fresh when_mentioned_or list and builds a Context for every message,
+``after`` rejects messages that don't start with one of the guild's prefixes before get_context.
+
+Run from the repo root:
+    python -m benchmarks.prefixes
+    python -m benchmarks.prefixes --messages 200000 --commands 0.01 --guilds 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import discord
+from discord.ext import commands
+
+from benchmarks.corpus import random_word
+from utils.prefixes import PrefixCache
+
+BOT_ID = 1004366744245899304
+DEFAULT_PREFIX = "$"
+
+
+def stream(messages: int, guilds: int, command_rate: float, seed: int = 0) -> tuple[list[Any], PrefixCache]:
+    rng = random.Random(seed)
+    cache = PrefixCache(DEFAULT_PREFIX, max_size=guilds)
+    # a fifth of the guilds changed their prefix, some have a couple of them
+    cache.load(
+        [
+            (guild_id, tuple(rng.sample(("!", "?", "m!", "mr ", "."), rng.randint(1, 3))))
+            for guild_id in range(guilds)
+            if rng.random() < 0.2
+        ]
+    )
+
+    replay = []
+    for _ in range(messages):
+        guild_id = rng.randrange(guilds)
+        if rng.random() < command_rate:
+            # the first prefix, the only one before could know about, so both modes find the same commands
+            prefix = rng.choice((cache.get(guild_id)[0], f"<@{BOT_ID}> "))  # type: ignore
+            content = f"{prefix}{rng.choice(('mmrl', 'help', 'prefix', 'about'))}"
+        else:
+            content = " ".join(random_word(rng).lower() for _ in range(rng.randint(1, 12)))
+        replay.append(
+            SimpleNamespace(
+                content=content,
+                guild=SimpleNamespace(id=guild_id),
+                author=SimpleNamespace(id=rng.randint(10**17, 10**18 - 1), bot=False),
+                _state=None,
+            )
+        )
+    return replay, cache
+
+
+def make_bot(cache: PrefixCache) -> commands.Bot:
+    async def before_prefix(bot: commands.Bot, message: discord.Message) -> list[str]:
+        # what get_prefix did: look the guild up and build a when_mentioned_or list for every message
+        prefix = cache.get(message.guild.id)[0]  # type: ignore
+        return commands.when_mentioned_or(prefix)(bot, message)
+
+    bot = commands.Bot(command_prefix=before_prefix, intents=discord.Intents.none())
+    bot._connection.user = SimpleNamespace(id=BOT_ID)  # type: ignore
+    return bot
+
+
+async def before(bot: commands.Bot, replay: list[Any]) -> int:
+    found = 0
+    for message in replay:
+        found += (await bot.get_context(message)).valid
+    return found
+
+
+async def after(bot: commands.Bot, replay: list[Any], cache: PrefixCache) -> int:
+    mention_prefixes = (f"<@{BOT_ID}> ", f"<@!{BOT_ID}> ")
+
+    async def get_prefix(bot: commands.Bot, message: discord.Message) -> list[str]:
+        return [*mention_prefixes, *cache.get(message.guild.id)]  # type: ignore
+
+    bot.command_prefix = get_prefix
+    found = 0
+    for message in replay:
+        prefixes = cache.get(message.guild.id)
+        if not message.content.startswith(prefixes) and not message.content.startswith(mention_prefixes):
+            continue
+        found += (await bot.get_context(message)).valid
+    return found
+
+
+async def run(args: argparse.Namespace) -> None:
+    replay, cache = stream(args.messages, args.guilds, args.commands)
+    bot = make_bot(cache)
+
+    async def callback(ctx: commands.Context[commands.Bot]) -> None:
+        pass
+
+    for name in ("mmrl", "prefix", "about"):  # help is already registered
+        bot.add_command(commands.Command(callback, name=name))
+
+    print(f"{'mode':<8} {'messages':>9} {'commands':>9} {'time':>10} {'msgs/s':>12}")
+    for mode in ("before", "after"):
+        start = time.perf_counter()
+        found = await (before(bot, replay) if mode == "before" else after(bot, replay, cache))
+        elapsed = time.perf_counter() - start
+        print(f"{mode:<8} {len(replay):>9} {found:>9} {elapsed:>8.3f} s {len(replay) / elapsed:>12,.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--guilds", type=int, default=2000)
+    parser.add_argument("--commands", type=float, default=0.02, help="share of messages that are commands")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
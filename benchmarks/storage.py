@@ -0,0 +1,86 @@
+"""Prefix writes during a simulated join storm: a commit per write against the write-behind batches.
+
+Run from the repo root:
+    python -m benchmarks.storage
+    python -m benchmarks.storage --guilds 5000 --concurrency 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from utils.storage import DELETE_PREFIXES, INSERT_PREFIX, Storage
+
+
+def storm(guilds: int, seed: int = 0) -> list[tuple[int, tuple[str, ...]]]:
+    # mostly joins (deleting rows that usually aren't there) with some prefix changes mixed in
+    rng = random.Random(seed)
+    ids = [rng.randint(10**17, 10**18 - 1) for _ in range(guilds)]
+    return [(guild_id, (rng.choice("!?.$%"),) if rng.random() < 0.2 else ()) for guild_id in ids]
+
+
+async def per_write(storage: Storage, writes: list[tuple[int, tuple[str, ...]]], concurrency: int) -> None:
+    # what the prefix cog did before: its own connection and commit for every write
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def write(guild_id: int, prefixes: tuple[str, ...]) -> None:
+        async with semaphore, storage.pool.acquire() as conn:
+            await conn.execute(DELETE_PREFIXES, (guild_id,))
+            for prefix in prefixes:
+                await conn.execute(INSERT_PREFIX, (guild_id, prefix))
+            await conn.commit()
+
+    await asyncio.gather(*(write(guild_id, prefixes) for guild_id, prefixes in writes))
+
+
+async def write_behind(storage: Storage, writes: list[tuple[int, tuple[str, ...]]]) -> None:
+    for guild_id, prefixes in writes:
+        if prefixes:
+            storage.set_prefixes(guild_id, prefixes)
+        else:
+            storage.delete_prefixes(guild_id)
+        # events arrive one by one from the gateway, give the writer a chance to run in between
+        await asyncio.sleep(0)
+    await storage.flush()
+
+
+async def run(args: argparse.Namespace) -> None:
+    writes = storm(args.guilds)
+    print(f"{'mode':<12} {'writes':>7} {'time':>10} {'ops/s':>10} {'commits':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ("per_write", "write_behind"):
+            storage = await Storage.open(
+                str(Path(directory, f"{mode}.db")),
+                synchronous=args.synchronous,
+                flush_interval=args.flush_interval,
+                max_batch=args.max_batch,
+            )
+            start = time.perf_counter()
+            if mode == "per_write":
+                await per_write(storage, writes, args.concurrency)
+                commits = len(writes)
+            else:
+                await write_behind(storage, writes)
+                commits = storage.flushes
+            elapsed = time.perf_counter() - start
+            await storage.close()
+            print(f"{mode:<12} {len(writes):>7} {elapsed:>8.3f} s {len(writes) / elapsed:>10,.0f} {commits:>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--guilds", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100, help="in-flight writes for per_write")
+    parser.add_argument("--synchronous", default="NORMAL")
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    parser.add_argument("--max-batch", type=int, default=500)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
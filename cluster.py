@@ -0,0 +1,111 @@
+# cluster.py
+"""Runs the bot as several processes, each one an AutoShardedBot with its own group of shards.
+
+    python cluster.py
+
+The processes share the sqlite database (WAL lets them read while one writes) and a relay in this
+launcher passes prefix changes between them, so each process' prefix cache stays in sync.
+"""
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import time
+
+import aiohttp
+import toml
+
+from utils.ipc import Relay
+from utils.storage import Storage
+
+config = toml.load("config.toml")
+cluster_config = config.get("cluster", {})
+# spawned, not forked: a fork would copy the launcher's running event loop, relay sockets and aiohttp state
+# into every cluster (and fork is unavailable on windows anyway)
+spawn = multiprocessing.get_context("spawn")
+
+
+def run_cluster(index: int, shard_ids: list[int], shard_count: int, relay: tuple[str, int]) -> None:
+    # imported in the child, the launcher itself never needs discord.py's bot machinery
+    from main import Bot
+
+    handler = logging.FileHandler(filename=f"discord-{index}.log", encoding="utf-8", mode="w")
+    bot = Bot(shard_ids=shard_ids, shard_count=shard_count, cluster=index, relay=relay)
+    bot.run(config["TOKEN"], log_handler=handler)
+
+
+async def recommended_shards() -> tuple[int, int]:
+    # the shard count discord recommends and how many shards may identify at once
+    async with (
+        aiohttp.ClientSession() as session,
+        session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {config['TOKEN']}"},
+            raise_for_status=True,
+        ) as response,
+    ):
+        data = await response.json()
+    return data["shards"], data["session_start_limit"]["max_concurrency"]
+
+
+def shard_groups(shard_count: int, clusters: int) -> list[list[int]]:
+    # consecutive shards per process, the last one may get fewer
+    size = math.ceil(shard_count / clusters)
+    return [list(range(start, min(start + size, shard_count))) for start in range(0, shard_count, size)]
+
+
+def start_process(
+    index: int, shard_ids: list[int], shard_count: int, relay: tuple[str, int]
+) -> multiprocessing.process.BaseProcess:
+    process = spawn.Process(target=run_cluster, args=(index, shard_ids, shard_count, relay), name=f"cluster-{index}")
+    process.start()
+    print(f"Started cluster {index} (shards {shard_ids[0]}-{shard_ids[-1]}, pid {process.pid})")
+    return process
+
+
+async def launch(processes: dict[int, multiprocessing.process.BaseProcess]) -> None:
+    shard_count, max_concurrency = await recommended_shards()
+    shard_count = cluster_config.get("shard_count") or shard_count
+    groups = shard_groups(shard_count, cluster_config.get("clusters") or multiprocessing.cpu_count())
+
+    # migrations run once here, before any cluster opens the database
+    storage = await Storage.open(**config.get("storage", {}))
+    await storage.close()
+
+    relay = (cluster_config.get("relay_host", "127.0.0.1"), cluster_config.get("relay_port", 8765))
+    server = await Relay().start(*relay)
+
+    # identifies are limited per bot account, not per process: a cluster starts once the one before it
+    # had the time to identify every shard it runs (one every 5 seconds per concurrency bucket)
+    for index, shard_ids in enumerate(groups):
+        processes[index] = start_process(index, shard_ids, shard_count, relay)
+        if index < len(groups) - 1:
+            await asyncio.sleep(5 * math.ceil(len(shard_ids) / max_concurrency))
+
+    async with server:
+        while True:
+            await asyncio.sleep(cluster_config.get("restart_delay", 10))
+            for index, process in processes.items():
+                if not process.is_alive():
+                    print(f"Cluster {index} exited with code {process.exitcode}, restarting it")
+                    processes[index] = start_process(index, groups[index], shard_count, relay)
+
+
+def main() -> None:
+    processes: dict[int, multiprocessing.process.BaseProcess] = {}
+    try:
+        asyncio.run(launch(processes))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # the clusters got the same ctrl+c and are closing on their own, they get a moment before being killed
+        deadline = time.monotonic() + 15
+        for process in processes.values():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                process.terminate()
+
+
+if __name__ == "__main__":
+    main()
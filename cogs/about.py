@@ -1,24 +1,69 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
 import itertools
 import platform
 from typing import TYPE_CHECKING
 
 import discord
-import psutil
-import pygit2  # type: ignore
 from discord import utils
 from discord.ext import commands
 
+from utils.metrics import metrics
+from utils.stats import GuildStats, cached_user_count
+
 if TYPE_CHECKING:
+    import psutil
+    import pygit2  # type: ignore
+
     from main import Bot
 
 
 class About(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.process = psutil.Process()
+        self.process: psutil.Process | None = None
+        self.stats = GuildStats()
+        self.revision: asyncio.Task[str] | None = None
+
+    async def cog_load(self) -> None:
+        # the commits only change with a restart (or a reload of this cog), they're read once in the
+        # background here instead of holding up the rest of the startup
+        self.revision = asyncio.create_task(asyncio.to_thread(self.get_last_commits))
+        if self.bot.is_ready():
+            self.stats.rebuild(self.bot.guilds)
+
+    @commands.Cog.listener()
+    async def on_ready(self) -> None:
+        self.stats.rebuild(self.bot.guilds)
+
+    @commands.Cog.listener("on_guild_join")
+    @commands.Cog.listener("on_guild_available")
+    @commands.Cog.listener("on_guild_unavailable")
+    async def on_guild_change(self, guild: discord.Guild) -> None:
+        self.stats.update(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        self.stats.remove(guild.id)
+
+    @commands.Cog.listener("on_guild_channel_create")
+    @commands.Cog.listener("on_guild_channel_delete")
+    async def on_channel_change(self, channel: discord.abc.GuildChannel) -> None:
+        self.stats.update(channel.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+        # discord.py keeps announcement channels as TextChannel, only a text <-> voice change (or one to a stage
+        # or forum channel) moves a channel between the counted types
+        if type(before) is not type(after):
+            self.stats.update(after.guild)
+
+    @commands.Cog.listener("on_member_join")
+    @commands.Cog.listener("on_member_remove")
+    async def on_member_change(self, member: discord.Member) -> None:
+        self.stats.update_members(member.guild)
 
     # This code is licensed MPL v2 from https://github.com/Rapptz/RoboDanny
     # https://github.com/Rapptz/RoboDanny/blob/rewrite/cogs/stats.py#L260-L304
@@ -34,6 +79,8 @@ class About(commands.Cog):
         return f"[`{short_sha2}`](https://github.com/tuna-chan404/mudae-regex/commit/{commit.hex}) {short} ({offset})"
 
     def get_last_commits(self, count: int = 3) -> str:
+        import pygit2  # type: ignore
+
         repo = pygit2.Repository(".git")
         commits = list(itertools.islice(repo.walk(repo.head.target, pygit2.GIT_SORT_TOPOLOGICAL), count))
         return "\n".join(self.format_commit(c) for c in commits)
@@ -41,35 +88,39 @@ class About(commands.Cog):
     @commands.hybrid_command(name="about")
     async def about(self, ctx: commands.Context[Bot]) -> None:
         """Tells you information about the bot itself."""
-        revision = self.get_last_commits()
-        embed = discord.Embed(description="Latest Changes:\n" + revision)
+        embed = discord.Embed(description="Latest Changes:\n" + await self.revision)  # type: ignore
         embed.color = discord.Color.brand_red()
         embed.set_author(name=str(ctx.author.name), icon_url=ctx.author.display_avatar.url)
 
-        # statistics
-        total_members = 0
-        total_unique = len(self.bot.users)
-
-        text = 0
-        voice = 0
-        guilds = 0
-        for guild in self.bot.guilds:
-            guilds += 1
-            if guild.unavailable:
-                continue
-
-            total_members += guild.member_count or 0
-            for channel in guild.channels:
-                if isinstance(channel, discord.TextChannel):
-                    text += 1
-                elif isinstance(channel, discord.VoiceChannel):
-                    voice += 1
-        embed.add_field(name="Members", value=f"{total_members} total\n{total_unique} unique")
-        embed.add_field(name="Channels", value=f"{text + voice} total\n{text} text\n{voice} voice")
+        # statistics, kept up to date by the listeners above
+        stats = self.stats
+        # without the members intent only the authors of recent messages are cached
+        unique = f"{cached_user_count(self.bot)} unique" if self.bot.intents.members else "unique count unavailable"
+        embed.add_field(name="Members", value=f"{stats.members} total\n{unique}")
+        embed.add_field(name="Channels", value=f"{stats.text + stats.voice} total\n{stats.text} text\n{stats.voice} voice")
+        import psutil
+
+        if self.process is None:
+            self.process = psutil.Process()
         memory_usage = self.process.memory_full_info().uss / 1024**2
         cpu_usage = self.process.cpu_percent() / psutil.cpu_count()
         embed.add_field(name="Process", value=f"{memory_usage:.2f} MiB\n{cpu_usage:.2f}% CPU")
-        embed.add_field(name="Guilds", value=guilds)
+        embed.add_field(name="Guilds", value=len(stats))
+        parsers = self.bot.executor.stats()  # type: ignore
+        embed.add_field(
+            name="Parsers",
+            value=f"{parsers['offloaded_calls']} off loop ({parsers['offloaded_seconds']:.2f}s)\n"
+            f"{parsers['inline_calls']} inline\n{parsers['rejected']} refused",
+        )
+        # read through the metrics collectors, they're registered again when the regex cog is reloaded
+        tracked = metrics.collect("tracks")
+        edits = metrics.collect("edits")
+        embed.add_field(
+            name="Tracked Lists",
+            value=f"{tracked.get('entries', 0)} lists ({tracked.get('compressed', 0)} compressed)\n"
+            f"{tracked.get('stored_bytes', 0) / 1024**2:.2f} MiB\n{tracked.get('evictions', 0)} evicted\n"
+            f"{edits.get('new_page', 0)}/{edits.get('total', 0)} edits kept",
+        )
         embed.add_field(
             name="python",
             value=f"""
@@ -91,6 +142,16 @@ class About(commands.Cog):
 
         await ctx.send(embed=embed, view=view)
 
+    @commands.command(hidden=True)
+    @commands.is_owner()
+    async def metrics(self, ctx: commands.Context[Bot]) -> None:
+        """Latency percentiles and counters recorded since startup."""
+        rows = metrics.summary() or ["nothing recorded yet"]
+        text = "\n".join(rows)
+        if len(text) > 1900:
+            text = text[:1900].rpartition("\n")[0] + "\n..."
+        await ctx.send(f"```\n{text}\n```")
+
     @commands.hybrid_command(name="uptime")
     async def uptime(self, ctx: commands.Context[Bot]) -> None:
         resolved_full = utils.format_dt(ctx.bot.launch_time, "F")
@@ -4,11 +4,15 @@ from typing import TYPE_CHECKING
 
 from discord.ext import commands
 
+from utils.prefixes import matcher
+
 if TYPE_CHECKING:
     from discord import Guild
 
     from main import Bot
 
+MAX_PREFIXES = 10
+
 
 class Prefix(commands.Cog):
     def __init__(self, bot: Bot) -> None:
@@ -16,57 +20,100 @@ class Prefix(commands.Cog):
 
     @commands.Cog.listener()
     async def on_guild_join(self, guild: Guild) -> None:
-        self.bot.prefixes[guild.id] = self.bot.default_prefix
-        async with self.bot.pool.acquire() as conn:
-            await conn.execute(
-                """
-                INSERT INTO
-                    prefixes (guild_id, prefix)
-                VALUES
-                    (?, ?)
-                ON CONFLICT (guild_id) DO UPDATE
-                SET
-                    prefix = excluded.prefix
-                """,
-                (guild.id, self.bot.default_prefix),
-            )
-            await conn.commit()
+        # a guild starts on the default prefix, which is served without rows
+        self.bot.storage.delete_prefixes(guild.id)
+        self.bot.prefixes.set(guild.id, self.bot.prefixes.default)
+        self.bot.publish_prefixes(guild.id, ())
 
     @commands.Cog.listener()
     async def on_guild_remove(self, guild: Guild) -> None:
-        self.bot.prefixes[guild.id] = self.bot.default_prefix
-        async with self.bot.pool.acquire() as conn:
-            await conn.execute(
-                "DELETE FROM prefixes WHERE guild_id = ?",
-                (guild.id,),
-            )
-            await conn.commit()
-
-    @commands.hybrid_command(name="prefix")
+        self.bot.storage.delete_prefixes(guild.id)
+        self.bot.prefixes.invalidate(guild.id)
+        self.bot.publish_prefixes(guild.id, ())
+
+    def save(self, guild_id: int, prefixes: tuple[str, ...]) -> None:
+        prefixes = matcher(prefixes) or self.bot.prefixes.default
+        if prefixes == self.bot.prefixes.default:
+            self.bot.storage.delete_prefixes(guild_id)
+        else:
+            self.bot.storage.set_prefixes(guild_id, prefixes)
+        # replaces the guild's matcher, the next message is already checked against the new prefixes
+        self.bot.prefixes.set(guild_id, prefixes)
+        self.bot.publish_prefixes(guild_id, prefixes)
+
+    # without a fallback the group itself is text only, /prefix always goes through a subcommand
+    @commands.hybrid_group(name="prefix", invoke_without_command=True)
+    @commands.guild_only()
+    async def prefix(self, ctx: commands.Context[Bot], prefix: str | None = None) -> None:
+        """list the bot prefixes of this server, or replace them with the given one"""
+        # `prefix <new>` set the prefix before there were subcommands, it still does
+        if prefix is not None:
+            if not ctx.channel.permissions_for(ctx.author).administrator:  # type: ignore
+                raise commands.MissingPermissions(["administrator"])
+            await self.prefix_set(ctx, prefix)
+        else:
+            await self.prefix_list(ctx)
+
+    @prefix.command(name="list")
+    @commands.guild_only()
+    async def prefix_list(self, ctx: commands.Context[Bot]) -> None:
+        """list the bot prefixes of this server"""
+        if not ctx.guild:
+            return
+
+        prefixes = await self.bot.guild_prefixes(ctx.guild.id)
+        await ctx.send(f"prefixes: {', '.join(f'`{prefix}`' for prefix in prefixes)}")
+
+    @prefix.command(name="set")
     @commands.has_permissions(administrator=True)
     @commands.guild_only()
-    async def prefix(self, ctx: commands.Context[Bot], prefix: str) -> None:
-        """change bot prefix"""
+    async def prefix_set(self, ctx: commands.Context[Bot], prefix: str) -> None:
+        """replace every bot prefix with a single one"""
         if not ctx.guild:
             return
 
-        async with self.bot.pool.acquire() as conn:
-            await conn.execute(
-                """
-                INSERT INTO
-                    prefixes (guild_id, prefix)
-                VALUES
-                    (?, ?)
-                ON CONFLICT (guild_id) DO UPDATE
-                SET
-                    prefix = excluded.prefix
-                """,
-                (ctx.guild.id, prefix),
-            )
-            await conn.commit()
-        self.bot.prefixes[ctx.guild.id] = prefix
+        self.save(ctx.guild.id, (prefix,))
         await ctx.send(f"prefix changed to `{prefix}`")
 
+    @prefix.command(name="add")
+    @commands.has_permissions(administrator=True)
+    @commands.guild_only()
+    async def prefix_add(self, ctx: commands.Context[Bot], prefix: str) -> None:
+        """add a bot prefix"""
+        if not ctx.guild:
+            return
+
+        prefixes = await self.bot.guild_prefixes(ctx.guild.id)
+        if prefix in prefixes:
+            await ctx.send(f"`{prefix}` is already a prefix")
+            return
+        if len(prefixes) >= MAX_PREFIXES:
+            await ctx.send(f"a server can have up to {MAX_PREFIXES} prefixes")
+            return
+
+        self.save(ctx.guild.id, (*prefixes, prefix))
+        await ctx.send(f"added prefix `{prefix}`")
+
+    @prefix.command(name="remove")
+    @commands.has_permissions(administrator=True)
+    @commands.guild_only()
+    async def prefix_remove(self, ctx: commands.Context[Bot], prefix: str) -> None:
+        """remove a bot prefix, the default prefix is used again once every prefix is removed"""
+        if not ctx.guild:
+            return
+
+        prefixes = await self.bot.guild_prefixes(ctx.guild.id)
+        if prefix not in prefixes:
+            await ctx.send(f"`{prefix}` isn't a prefix")
+            return
+
+        remaining = tuple(p for p in prefixes if p != prefix)
+        self.save(ctx.guild.id, remaining)
+        if remaining:
+            await ctx.send(f"removed prefix `{prefix}`")
+        else:
+            await ctx.send(f"removed prefix `{prefix}`, back to the default prefix `{self.bot.default_prefix}`")
+
 
 async def setup(bot: Bot) -> None:
     await bot.add_cog(Prefix(bot))
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+import bisect
 import inspect
 import re
-from typing import TYPE_CHECKING, Callable, Self, Sized
+import sys
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Self
 
 import discord
 import toml
@@ -10,14 +14,26 @@ from discord import app_commands
 from discord.ext import commands
 from more_itertools import constrained_batches
 
+from utils.deliveries import DeliveryQueue, DeliveryQueueFull
+from utils.executor import ExecutorBusy
+from utils.metrics import metrics
+from utils.tracks import TrackStore
+
 if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Sized
+
     from main import Bot
+    from utils.executor import ParserExecutor
 
-tracks: dict[int, list[str]] = {}
+config = toml.load("config.toml")
+tracks = TrackStore(**config.get("tracks", {}))
+deliveries = DeliveryQueue(**config.get("deliveries", {}))
 # a list of chracters that have '-' in there name, for exmple:
 # 'Sky Striker Ace - Roze'
 #                 ^
-EXCLUSION: list[str] = toml.load("config.toml")["exclusion_list"]
+EXCLUSION: list[str] = config["exclusion_list"]
+MUDAE_ID = str(config.get("mudae_id", 432610292342587392))
+edit_events: Counter[str] = Counter()
 
 
 # +2 for ' $'
@@ -25,16 +41,39 @@ def get_len(item: Sized) -> int:
     return len(item) + 2
 
 
+# one alternation factored by common prefixes, every branch of a node starts with a different character
+# so a match attempt costs the length of the words instead of the number of words
+def trie_pattern(words: Iterable[str]) -> re.Pattern[str]:
+    trie: dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if "" not in node and len(branches) == 1:
+            return branches[0]
+        # longer branches are greedy, so the longest exclusion wins like in the old replace loop
+        return f"(?:{'|'.join(branches)}){'?' if '' in node else ''}"
+
+    # (?!) never matches, an empty exclusion list shouldn't match everywhere
+    return re.compile(build(trie) if trie else "(?!)")
+
+
+exclusion_pattern = trie_pattern(EXCLUSION)
+encoded_exclusion_pattern = trie_pattern(i.replace("-", "&45;") for i in EXCLUSION)
+
+
 def encode_exclusions(text: str) -> str:
-    for i in EXCLUSION:
-        text = text.replace(i, i.replace("-", "&45;"))
-    return text
+    return exclusion_pattern.sub(lambda m: m[0].replace("-", "&45;"), text)
 
 
 def decode_exclusions(text: str) -> str:
-    for i in EXCLUSION:
-        text = text.replace(i.replace("-", "&45;"), i)
-    return text
+    return encoded_exclusion_pattern.sub(lambda m: m[0].replace("&45;", "-"), text)
 
 
 regex_pattern = re.compile(
@@ -42,47 +81,48 @@ regex_pattern = re.compile(
     r"AVG: \d+|<?:kakera:(\d+)?>?|Total value: \d+|\d+ \$wa, \d+ \$ha, \d+ \$wg, \d+ \$hg|^.+ - \d+\/\d+",
     flags=re.M,
 )
-
-
-def regex(content: str) -> list[str]:
-    content = re.sub(r"\*.*\*\n\n", "", content, flags=re.M | re.DOTALL)
-    encoded = encode_exclusions(content.replace("*", ""))
-    post_regex = regex_pattern.sub("", encoded)
-    decoded = decode_exclusions(post_regex)
-    return [i.strip() for i in decoded.splitlines() if i != ""]
-
-
-def remove_sl_regex(content: str) -> list[str]:
-    soulmate_list: list[str] = [line for line in content.splitlines() if re.search(r"\(Soulkeys: (\*\*)?\d{2,}", line)]
-    return regex("\n".join(soulmate_list))
-
-
-def pin_regex(content: str) -> list[str]:
-    return re.findall(r"(?<=:)pin\d+(?=:)|(?<=<:unkn:\d{18}> · )pin\d+", content, flags=re.M)
-
-
-def dl_regex(content: str) -> list[str]:
-    dl = re.sub(
-        r"\d+ disabled \([\d$whag ,]+\)|.+\(\$toggleirl\)|.+\(\$togglewestern\)| ⚠ ",
-        "",
-        content.replace("*", ""),
-        flags=re.M,
-    )
-    dl = re.findall(r".+(?= \()", dl, re.M)
-    return list(filter(None, dl))
-
-
-clean_notes_pattern = re.compile(
-    r"^#\d+ - | ? 💞 => .+?(?= \|)| 🚫 \$.*| \· \(\$.*|[\u200b]| \d+ ka|\(Soulkeys: \d+\)| \(#[\da-f]{6}\)|Top 15"
-    r" value: \d+|"
-    r"AVG: \d+||Total value: \d+|\d+ \$wa, \d+ \$ha, \d+ \$wg, \d+ \$hg|^.+ - \d+\/\d+",
+# fields kept on each entry, the name is whatever regex_pattern leaves of the line
+field_pattern = re.compile(r" (?P<kakera>\d+) ka|\(Soulkeys: (?P<soulkeys>\d+)\)|\(#(?P<embed_color>[\da-f]{6})\)")
+note_noise_pattern = re.compile(r" 🚫 \$.*| · \(\$.*|[\u200b]| \d+ ka|\(Soulkeys: \d+\)| \(#[\da-f]{6}\)")
+# regex_pattern without its cut at the first ' - ', ' | '..., for the part of a $n or $ai line before the
+# note or image, names like 'Kaguya - Love is War' are kept whole there
+full_name_pattern = re.compile(
+    r"^#\d+ - | ?💞 => .*| 🚫 \$.*| · \(\$.*|[\u200b❌⭐🔐✅]| \d+ ka|\(Soulkeys: \d+\)| \(#[\da-f]{6}\)|<?:kakera:(\d+)?>?",
     flags=re.M,
 )
 
 
-def note_regex(content: str) -> list[str]:
+def split_lines(content: str, start: int = 0, stop: int | None = None) -> Iterator[str]:
+    stop = len(content) if stop is None else stop
+    while start < stop:
+        end = content.find("\n", start, stop)
+        if end == -1:
+            end = stop
+        yield content[start:end]
+        start = end + 1
+
+
+def iter_lines(content: str) -> Iterator[str]:
+    # same as re.sub(r"\*.*\*\n\n", "", content, flags=re.DOTALL), everything from the first '*' to the
+    # last '*\n\n' is mudae's header, but the rest of the text is never copied
+    start = content.find("*")
+    end = content.rfind("*\n\n")
+    if not -1 < start < end:
+        yield from split_lines(content)
+        return
+
+    line_start = content.rfind("\n", 0, start) + 1
+    yield from split_lines(content, 0, line_start)
+    end += 3
+    line_end = content.find("\n", end)
+    if line_end == -1:
+        line_end = len(content)
+    yield content[line_start:start] + content[end:line_end]
+    yield from split_lines(content, line_end + 1)
+
+
+def format_notes(lines: list[tuple[str, str]]) -> list[str]:
     notes: dict[str, list[str]] = {}
-    lines = re.findall(r"(.*) \| (.*)", clean_notes_pattern.sub("", content.replace("*", "")), re.M)
     for name, note in lines:
         notes.setdefault(note, []).append(name)
 
@@ -93,10 +133,9 @@ def note_regex(content: str) -> list[str]:
     return notes_list
 
 
-def image_regex(content: str) -> list[str]:
+def format_images(lines: list[tuple[str, str]]) -> list[str]:
     ai: dict[str, list[str]] = {}
-    for line in content.replace("*", "").splitlines():
-        name, image = re.findall(r".+[^*\r\n]+(?= - https)|(?<= - )https:.+", line, re.M)
+    for name, image in lines:
         ai.setdefault(name, []).append(image)
 
     ail: list[str] = []
@@ -106,15 +145,7 @@ def image_regex(content: str) -> list[str]:
     return ail
 
 
-clean_ec_pattern = re.compile(
-    r"^#\d+ - |\s+?[=\-·\|💞🚫].+?(?= \(#)|[\u200b❌⭐🔐✅]| \d+ ka|\(Soulkeys: \d+\)|Top 15 value: \d+|"
-    r"AVG: \d+|<?:kakera:(\d+)?>?|Total value: \d+|\d+ \$wa, \d+ \$ha, \d+ \$wg, \d+ \$hg|^.+ - \d+\/\d+",
-    flags=re.M,
-)
-
-
-def ec_regex(content: str) -> list[str]:
-    lines = re.findall(r"(.*) \(\#(.*)\)", clean_ec_pattern.sub("", content.replace("*", "")), re.M)
+def format_ec(lines: list[tuple[str, str]]) -> list[str]:
     ec: dict[str, list[str]] = {}
     for character, embed_color in lines:
         ec.setdefault(embed_color, []).append(character)
@@ -126,6 +157,186 @@ def ec_regex(content: str) -> list[str]:
     return ec_list
 
 
+def clean_name(line: str) -> str:
+    return decode_exclusions(regex_pattern.sub("", encode_exclusions(line))).strip()
+
+
+def clean_full_name(head: str) -> str:
+    return decode_exclusions(full_name_pattern.sub("", encode_exclusions(head))).strip()
+
+
+class HaremEntry:
+    __slots__ = ("embed_color", "image", "image_name", "kakera", "name", "note", "note_name", "soulkeys")
+
+    def __init__(
+        self,
+        name: str,
+        kakera: int | None = None,
+        soulkeys: int | None = None,
+        note: str | None = None,
+        embed_color: str | None = None,
+        image: str | None = None,
+        note_name: str | None = None,
+        image_name: str | None = None,
+    ) -> None:
+        self.name = name
+        self.kakera = kakera
+        self.soulkeys = soulkeys
+        self.note = note
+        self.embed_color = embed_color
+        self.image = image
+        # $n and $ai target the whole name before the note or image, not the shortened self.name
+        self.note_name = note_name
+        self.image_name = image_name
+
+    def __repr__(self) -> str:
+        return f"<HaremEntry name={self.name!r} kakera={self.kakera} soulkeys={self.soulkeys}>"
+
+
+def parse_entry(line: str) -> HaremEntry | None:
+    line = line.replace("*", "")
+    name = clean_name(line)
+    if not name:
+        return None
+
+    # the same characters show up in many views, keep one copy of each name
+    entry = HaremEntry(sys.intern(name))
+    for match in field_pattern.finditer(line):
+        field = match.lastgroup
+        if field == "kakera":
+            entry.kakera = int(match["kakera"])
+        elif field == "soulkeys":
+            entry.soulkeys = int(match["soulkeys"])
+        elif field == "embed_color":
+            entry.embed_color = match["embed_color"]
+    # the note follows the last ' | ' and the image the last ' - https', like the old per-format parsers
+    if " | " in line:
+        head, _, note = line.rpartition(" | ")
+        entry.note = note_noise_pattern.sub("", note)
+        entry.note_name = sys.intern(clean_full_name(head))
+    if " - https" in line:
+        head, _, image = line.rpartition(" - https")
+        entry.image = f"https{image}".strip()
+        entry.image_name = sys.intern(clean_full_name(head))
+    return entry
+
+
+def iter_entries(content: str) -> Iterator[HaremEntry]:
+    for line in iter_lines(content):
+        if entry := parse_entry(line):
+            yield entry
+
+
+def iter_names(content: str) -> Iterator[str]:
+    for entry in iter_entries(content):
+        yield entry.name
+
+
+# every harem output is a projection over the same parsed entries
+def names(entries: Iterable[HaremEntry]) -> list[str]:
+    return [entry.name for entry in entries]
+
+
+def soulmates(entries: Iterable[HaremEntry]) -> list[str]:
+    return [entry.name for entry in entries if entry.soulkeys is not None and entry.soulkeys >= 10]
+
+
+def notes(entries: Iterable[HaremEntry]) -> list[str]:
+    return format_notes([(entry.note_name, entry.note) for entry in entries if entry.note_name and entry.note is not None])
+
+
+def embed_colors(entries: Iterable[HaremEntry]) -> list[str]:
+    return format_ec([(entry.name, entry.embed_color) for entry in entries if entry.embed_color is not None])
+
+
+def images(entries: Iterable[HaremEntry]) -> list[str]:
+    return format_images([(entry.image_name, entry.image) for entry in entries if entry.image_name and entry.image])
+
+
+def regex(content: str) -> list[str]:
+    return list(iter_names(content))
+
+
+def remove_sl_regex(content: str) -> list[str]:
+    return soulmates(iter_entries(content))
+
+
+def note_regex(content: str) -> list[str]:
+    return notes(iter_entries(content))
+
+
+def ec_regex(content: str) -> list[str]:
+    return embed_colors(iter_entries(content))
+
+
+def image_regex(content: str) -> list[str]:
+    return images(iter_entries(content))
+
+
+PROJECTIONS: dict[Callable[[str], list[str]], Callable[[Iterable[HaremEntry]], list[str]]] = {
+    regex: names,
+    remove_sl_regex: soulmates,
+    note_regex: notes,
+    ec_regex: embed_colors,
+    image_regex: images,
+}
+OUTPUT_TYPES: dict[str, Callable[[str], list[str]]] = {
+    "regex": regex,
+    "wrsl": remove_sl_regex,
+    "note": note_regex,
+    "ec": ec_regex,
+    "ail": image_regex,
+}
+
+
+# the functions below are what RowButtons hands to the parser executor, they only take and
+# return plain data so they also work on a process pool
+def parse_entries(content: str) -> list[HaremEntry]:
+    return list(iter_entries(content))
+
+
+def parse_pages(parser: Callable[[str], list[Any]], pages: list[str]) -> list[Any]:
+    # every page is parsed on its own: joined, the header of a later page would swallow the entries of the
+    # earlier ones (see iter_lines) and what a view shows would depend on how many pages arrived between clicks
+    return [item for page in pages for item in parser(page)]
+
+
+def page_offsets(items: list[str], offsets: list[int]) -> list[int]:
+    # start of every 1960 characters page in items, same packing as more_itertools.constrained_batches
+    # restarted from the last page because the newly parsed items may still fit in it
+    offsets = list(offsets)
+    start = offsets.pop() if offsets else 0
+    offsets.append(start)
+    size = 0
+    for index in range(start, len(items)):
+        length = get_len(items[index])
+        if size and size + length > 1960:
+            offsets.append(index)
+            size = 0
+        size += length
+    return offsets
+
+
+def project(regex_type: Callable[[str], list[str]], entries: list[HaremEntry]) -> tuple[list[str], list[int]]:
+    output = PROJECTIONS[regex_type](entries)
+    return output, page_offsets(output, [])
+
+
+def pin_regex(content: str) -> list[str]:
+    return re.findall(r"(?<=:)pin\d+(?=:)|(?<=<:unkn:\d{18}> · )pin\d+", content, flags=re.M)
+
+
+def dl_regex(content: str) -> list[str]:
+    dl = re.sub(
+        r"\d+ disabled \([\d$whag ,]+\)|.+\(\$toggleirl\)|.+\(\$togglewestern\)| ⚠ ",
+        "",
+        content.replace("*", ""),
+        flags=re.M,
+    )
+    dl = re.findall(r".+(?= \()", dl, re.M)
+    return list(filter(None, dl))
+
+
 class Regex(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
@@ -136,16 +347,32 @@ class Regex(commands.Cog):
             await interaction.response.send_message("that message has already been replied to", ephemeral=True)
             return
         if message.embeds and message.embeds[0].description:
-            tracks.update({message.id: [message.embeds[0].description]})
+            tracks.track(message.id, message.embeds[0].description)
             view = RowButtons(message.id, regex_type=regex)
             await interaction.response.send_message(view=view)
             view.message = await interaction.original_response()
 
+    # raw so mudae pages are picked up without the message cache, every edit the bot can see comes
+    # through here so anything that isn't a tracked mudae message is dropped before touching the payload
     @commands.Cog.listener()
-    async def on_message_edit(self, before: discord.Message, after: discord.Message) -> None:
-        embeds = after.embeds
-        if before.id in tracks and embeds and embeds[0].description and embeds[0].description not in tracks[before.id]:
-            tracks[before.id].append(embeds[0].description)
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent) -> None:
+        if payload.message_id not in tracks:
+            edit_events["untracked"] += 1
+            return
+
+        author = payload.data.get("author")
+        if author and author["id"] != MUDAE_ID:
+            edit_events["not_mudae"] += 1
+            return
+
+        embeds = payload.data.get("embeds")
+        description = embeds[0].get("description") if embeds else None
+        if not description:
+            edit_events["no_description"] += 1
+        elif tracks.append(payload.message_id, description):
+            edit_events["new_page"] += 1
+        else:
+            edit_events["duplicate"] += 1
 
     @commands.group(invoke_without_command=True)
     async def regex(self, ctx: commands.Context[Bot], *, characters: str | None) -> None:
@@ -172,7 +399,7 @@ class Regex(commands.Cog):
             if msg_id in tracks:
                 await ctx.reply("that message has already been replied to")
                 return
-            tracks.update({msg_id: [reply.resolved.embeds[0].description]})
+            tracks.track(msg_id, reply.resolved.embeds[0].description)
             view = RowButtons(msg_id, regex_type=regex)
             view.message = await ctx.send(view=view)
         else:
@@ -199,8 +426,7 @@ class Regex(commands.Cog):
         ):
             msg_id = reply.resolved.id
             description = reply.resolved.embeds[0].description
-            if msg_id not in tracks:
-                tracks.update({msg_id: [description]})
+            tracks.track(msg_id, description)
             view = RowButtons(msg_id, regex_type=pin_regex)
             view.message = await ctx.send(view=view)
         else:
@@ -222,8 +448,7 @@ class Regex(commands.Cog):
         ):
             msg_id = reply.resolved.id
             description = reply.resolved.embeds[0].description
-            if msg_id not in tracks:
-                tracks.update({msg_id: [description]})
+            tracks.track(msg_id, description)
             view = RowButtons(msg_id, regex_type=note_regex)
             view.message = await ctx.send(view=view)
         else:
@@ -246,8 +471,7 @@ class Regex(commands.Cog):
         ):
             msg_id = reply.resolved.id
             description = reply.resolved.embeds[0].description
-            if msg_id not in tracks:
-                tracks.update({msg_id: [description]})
+            tracks.track(msg_id, description)
             view = RowButtons(msg_id, regex_type=ec_regex)
             view.message = await ctx.send(view=view)
         else:
@@ -270,8 +494,7 @@ class Regex(commands.Cog):
         ):
             msg_id = reply.resolved.id
             description = reply.resolved.embeds[0].description
-            if msg_id not in tracks:
-                tracks.update({msg_id: [description]})
+            tracks.track(msg_id, description)
             view = RowButtons(msg_id, regex_type=remove_sl_regex)
             view.message = await ctx.send(view=view)
         else:
@@ -298,8 +521,7 @@ class Regex(commands.Cog):
         ):
             msg_id = reply.resolved.id
             description = reply.resolved.embeds[0].description
-            if msg_id not in tracks:
-                tracks.update({msg_id: [description]})
+            tracks.track(msg_id, description)
             view = RowButtons(msg_id, regex_type=image_regex)
             view.message = await ctx.send(view=view)
         else:
@@ -322,8 +544,7 @@ class Regex(commands.Cog):
         ):
             msg_id = reply.resolved.id
             description = reply.resolved.embeds[0].description
-            if msg_id not in tracks:
-                tracks.update({msg_id: [description]})
+            tracks.track(msg_id, description)
             view = RowButtons(msg_id, regex_type=dl_regex)
             view.message = await ctx.send(view=view)
         else:
@@ -348,18 +569,64 @@ class CharacterLimitModal(discord.ui.Modal, title="Set Character Limit"):
         self.stop()
 
 
+class JumpToPageModal(discord.ui.Modal, title="Jump to Page"):
+    page: discord.ui.TextInput[Self] = discord.ui.TextInput(label="Page Number")
+
+    async def on_submit(self, interaction: discord.Interaction) -> None:
+        self.interaction = interaction
+        await interaction.response.defer()
+        self.stop()
+
+
+async def edit_response(interaction: discord.Interaction, **kwargs: Any) -> None:
+    if interaction.response.is_done():
+        await interaction.edit_original_response(**kwargs)
+    else:
+        await interaction.response.edit_message(**kwargs)
+
+
+async def send_ephemeral(interaction: discord.Interaction, content: str) -> None:
+    if interaction.response.is_done():
+        await interaction.followup.send(content, ephemeral=True)
+    else:
+        await interaction.response.send_message(content, ephemeral=True)
+
+
+async def send_status(interaction: discord.Interaction, content: str) -> discord.InteractionMessage | discord.WebhookMessage:
+    # send_ephemeral, but with the message back so it can be edited later
+    if interaction.response.is_done():
+        return await interaction.followup.send(content, ephemeral=True, wait=True)
+    await interaction.response.send_message(content, ephemeral=True)
+    return await interaction.original_response()
+
+
 class RowButtons(discord.ui.View):
     def __init__(self, msg_id: int, regex_type: Callable[[str], list[str]]) -> None:
         self.max_character_count = None
         self.message: discord.InteractionMessage | discord.Message
         self.msg_id = msg_id
-        self.msgs: list[str] = tracks[msg_id]
         self.regex_type = regex_type
         self.current_page = -1
+        # number of tracked pages already parsed and their total length
+        self.parsed_msgs = 0
+        self.parsed_size = 0
+        self.entries: list[HaremEntry] = []
+        # False when self.output has to be projected again from self.entries
+        self.projected = True
+        # output and page offsets of every projection made from the current entries, switching back to an
+        # output type already shown doesn't project or paginate the list again
+        self.projections: dict[Callable[[str], list[str]], tuple[list[str], list[int]]] = {}
+        self.output: list[str] = []
+        # start of every page in self.output, a character limit only cuts the list short and greedy
+        # packing of a prefix gives the same pages so it's never rebuilt for it
+        self.page_offsets: list[int] = []
+        self.lock = asyncio.Lock()
         super().__init__(timeout=360)
+        if regex_type not in PROJECTIONS:
+            self.remove_item(self.output_type)
 
     async def on_timeout(self) -> None:
-        tracks.pop(self.msg_id)
+        tracks.remove(self.msg_id)
         for item in self.children:
             item.disabled = True  # type: ignore
         try:
@@ -367,15 +634,71 @@ class RowButtons(discord.ui.View):
         except discord.errors.NotFound:
             pass
 
-    def characters_pages(self) -> list[tuple[str]]:
-        regex_output = self.regex_type("\n".join(self.msgs))
-        characters = regex_output[: self.max_character_count] if self.max_character_count else regex_output
-        characters_pages: list[tuple[str]] = list(constrained_batches(characters, 1960, get_len=get_len))
-        return characters_pages
-
-    def format_embed(self, characters_pages: list[tuple[str]]) -> discord.Embed:
+    async def on_error(self, interaction: discord.Interaction, error: Exception, item: discord.ui.Item[Self]) -> None:
+        if isinstance(error, (ExecutorBusy, DeliveryQueueFull)):
+            await send_ephemeral(interaction, str(error))
+        else:
+            await super().on_error(interaction, error, item)
+
+    async def update(self, interaction: discord.Interaction, regex_type: Callable[[str], list[str]] | None = None) -> None:
+        # parse the pages mudae added since the last call, large lists are deferred and parsed off the event loop.
+        # A new regex_type (from the output select) is switched to under the lock, never while a projection runs
+        executor: ParserExecutor = interaction.client.executor  # type: ignore
+        # deferred before waiting on the lock, another click may hold it for longer than the 3 seconds an
+        # interaction has to be answered in. The whole tracked text bounds what the update can parse or project
+        switching = regex_type is not None and regex_type not in self.projections
+        pending = self.parsed_msgs < tracks.count(self.msg_id) or not self.projected or switching
+        slow = self.lock.locked() or executor.offloads(max(tracks.size(self.msg_id), self.parsed_size))
+        if pending and slow and not interaction.response.is_done():
+            await interaction.response.defer()
+
+        async with self.lock:
+            if regex_type is not None and regex_type is not self.regex_type:
+                self.regex_type = regex_type
+                self.projected = False
+            # bound once, the projection is cached under the type it was made for
+            regex_type = self.regex_type
+
+            # an evicted message has no new pages, the view keeps what it already parsed
+            if self.parsed_msgs < tracks.count(self.msg_id):
+                pages = tracks.pages(self.msg_id, self.parsed_msgs)
+                size = sum(map(len, pages))
+                if regex_type in PROJECTIONS:
+                    self.entries.extend(await executor.run(size, parse_pages, parse_entries, pages, label="parse_entries"))
+                    self.projections.clear()
+                    self.projected = False
+                else:
+                    self.output.extend(await executor.run(size, parse_pages, regex_type, pages, label=regex_type.__name__))
+                    self.page_offsets = page_offsets(self.output, self.page_offsets)
+                self.parsed_msgs += len(pages)
+                self.parsed_size += size
+
+            if not self.projected:
+                if regex_type not in self.projections:
+                    projection = await executor.run(self.parsed_size, project, regex_type, self.entries)
+                    self.projections[regex_type] = projection
+                self.output, self.page_offsets = self.projections[regex_type]
+                self.projected = True
+
+    def item_count(self) -> int:
+        total = len(self.output)
+        return min(total, self.max_character_count) if self.max_character_count else total
+
+    def page_count(self) -> int:
+        return bisect.bisect_left(self.page_offsets, self.item_count())
+
+    def get_page(self, page: int) -> tuple[str, ...]:
+        end = self.item_count()
+        if page + 1 < len(self.page_offsets):
+            end = min(end, self.page_offsets[page + 1])
+        return tuple(self.output[self.page_offsets[page] : end])
+
+    def characters_pages(self) -> list[tuple[str, ...]]:
+        return [self.get_page(page) for page in range(self.page_count())]
+
+    def format_embed(self) -> discord.Embed:
         embed = discord.Embed(color=discord.Color.brand_red())
-        description = characters_pages[self.current_page]
+        description = self.get_page(self.current_page)
         embed.description = f"Total number of characters: {len(description)}\n```\n{' $'.join(description)}\n```"
 
         if self.regex_type == pin_regex:
@@ -387,45 +710,45 @@ class RowButtons(discord.ui.View):
         elif self.regex_type == dl_regex:
             embed.description = f"Total number bundles: {len(description)}\n```{' $'.join(description)}```"
 
-        embed.set_footer(text=f"Page {self.current_page + 1} / {len(characters_pages)}")
+        embed.set_footer(text=f"Page {self.current_page + 1} / {self.page_count()}")
         return embed
 
     @discord.ui.button(emoji="<:RemLeft:1052054214634913882>", style=discord.ButtonStyle.secondary)
     async def previous(self, interaction: discord.Interaction, button: discord.ui.Button[Self]) -> None:
-        characters_pages = self.characters_pages()
+        await self.update(interaction)
         if self.current_page <= 0:
-            return await interaction.response.send_message("list index out of range", ephemeral=True)
+            return await send_ephemeral(interaction, "list index out of range")
         self.current_page -= 1
-        await interaction.response.edit_message(embed=self.format_embed(characters_pages))
+        await edit_response(interaction, embed=self.format_embed())
 
     @discord.ui.button(emoji="<:RamRight:1052054203901673482>", style=discord.ButtonStyle.secondary)
     async def next(self, interaction: discord.Interaction, button: discord.ui.Button[Self]) -> None:
-        characters_pages = self.characters_pages()
-        if self.current_page >= len(characters_pages) - 1:
-            return await interaction.response.send_message("list index out of range", ephemeral=True)
+        await self.update(interaction)
+        if self.current_page >= self.page_count() - 1:
+            return await send_ephemeral(interaction, "list index out of range")
         self.current_page += 1
-        await interaction.response.edit_message(embed=self.format_embed(characters_pages))
+        await edit_response(interaction, embed=self.format_embed())
 
     @discord.ui.button(label="DM", emoji="\U0001f4eb", style=discord.ButtonStyle.secondary)
     async def dm(self, interaction: discord.Interaction, button: discord.ui.Button[Self]) -> None:
-        button.disabled = True
-        if interaction.message:
-            await interaction.message.edit(view=self)
+        await self.update(interaction)
         characters_pages = self.characters_pages()
         pages = [f"```{' $'.join(characters)}```" for characters in characters_pages]
 
-        await interaction.response.send_message(f"sending {len(characters_pages)} messages", ephemeral=True)
         if self.regex_type == pin_regex:
             pages = [f"```{' '.join(pins)}```" for pins in characters_pages]
 
         elif self.regex_type in [note_regex, image_regex, ec_regex]:
             pages = ["".join(output) for output in characters_pages]
 
-        for page in pages:
-            await interaction.user.send(page)
-        button.disabled = False
-        if interaction.message:
-            await interaction.message.edit(view=self)
+        if not pages:
+            return await send_ephemeral(interaction, "nothing to send")
+        # the same list, output and limit is the same export, clicking again follows the one already on its way
+        key = (self.msg_id, self.regex_type, self.max_character_count, self.parsed_msgs)
+        delivery, position, joined = deliveries.submit(interaction.user, key, pages)
+        status = delivery.render(position)
+        status = await send_status(interaction, f"already on its way, {status}" if joined else status)
+        await deliveries.watch(delivery, status)
 
     @discord.ui.button(label="Character Limit", style=discord.ButtonStyle.secondary, row=1)
     async def character_limit(self, interaction: discord.Interaction, button: discord.ui.Button[Self]) -> None:
@@ -440,11 +763,49 @@ class RowButtons(discord.ui.View):
         value = int(modal.page.value)
         self.max_character_count = None if value == 0 else value
         self.current_page = 0
-        await interaction.edit_original_response(embed=self.format_embed(self.characters_pages()))
+        await self.update(interaction)
+        await interaction.edit_original_response(embed=self.format_embed())
+
+    @discord.ui.button(label="Jump to Page", style=discord.ButtonStyle.secondary, row=1)
+    async def jump_to_page(self, interaction: discord.Interaction, button: discord.ui.Button[Self]) -> None:
+        modal = JumpToPageModal()
+        await interaction.response.send_modal(modal)
+        timed_out = await modal.wait()
+
+        if timed_out:
+            await interaction.followup.send("Took too long", ephemeral=True)
+            return
+
+        page = int(modal.page.value) - 1
+        await self.update(interaction)
+        if not 0 <= page < self.page_count():
+            await interaction.followup.send("list index out of range", ephemeral=True)
+            return
+        self.current_page = page
+        await interaction.edit_original_response(embed=self.format_embed())
+
+    @discord.ui.select(
+        placeholder="Change output...",
+        row=2,
+        options=[
+            discord.SelectOption(label="Characters", value="regex"),
+            discord.SelectOption(label="Soulmates", value="wrsl"),
+            discord.SelectOption(label="Notes ($n)", value="note"),
+            discord.SelectOption(label="Embed Colors ($ec)", value="ec"),
+            discord.SelectOption(label="Custom Images ($ai)", value="ail"),
+        ],
+    )
+    async def output_type(self, interaction: discord.Interaction, select: discord.ui.Select[Self]) -> None:
+        # the entries are already parsed, switching output is only a new projection over them (or a cached one)
+        await self.update(interaction, OUTPUT_TYPES[select.values[0]])
+        if not self.page_count():
+            return await send_ephemeral(interaction, "nothing to show for this output")
+        self.current_page = 0
+        await edit_response(interaction, embed=self.format_embed())
 
     @discord.ui.button(label="Quit", style=discord.ButtonStyle.red, row=1)
     async def quit(self, interaction: discord.Interaction, button: discord.ui.Button[Self]) -> None:
-        tracks.pop(self.msg_id)
+        tracks.remove(self.msg_id)
         await interaction.response.defer()
         await interaction.delete_original_response()
         self.stop()
@@ -452,3 +813,6 @@ class RowButtons(discord.ui.View):
 
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(Regex(bot))
+    metrics.register("tracks", tracks.stats)
+    metrics.register("edits", lambda: {"total": edit_events.total(), **edit_events})
+    metrics.register("deliveries", deliveries.stats)
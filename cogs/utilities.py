@@ -1,29 +1,59 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import inspect
 import math
 import re
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from typing import TYPE_CHECKING, Self
+from typing import TYPE_CHECKING, Literal, Self
 
+import aiohttp
 import discord
-import fast_colorthief  # type: ignore
-from aiohttp import FormData
-from colormap import rgb2hex  # type: ignore
+import toml
 from discord import app_commands, ui
 from discord.ext import commands, menus
 from discord.ext.commands import Greedy  # type: ignore  # noqa: TCH002
-from PIL import Image, ImageDraw, ImageFont
+
+from utils.executor import ExecutorBusy
+from utils.fetcher import ImageTooLarge
+from utils.kakera import kakera_value, kakera_values
+from utils.metrics import metrics
+from utils.palettes import PaletteCache, PaletteMode, content_key, extract_palette
+from utils.uploads import ByteBudget, UploadFile, UploadProgress, upload_form
 
 if TYPE_CHECKING:
+    from PIL import ImageFont
+
     from main import Bot
 
-font = ImageFont.truetype(
-    "Assets/fonts/JetBrainsMono/JetBrainsMono-ExtraBold.ttf",
-    size=16,
-    layout_engine=ImageFont.Layout.BASIC,
-)
+config = toml.load("config.toml")
+palettes = PaletteCache(**config.get("palettes", {}))
+PALETTE_MODE: PaletteMode = config.get("palette_mode", "full")
+PALETTE_MAX_PIXELS: int = config.get("palette_max_pixels", 160000)
+# pages ahead of the current one whose palettes are computed while it's being looked at
+PALETTE_PREFETCH: int = config.get("palette_prefetch", 2)
+# every menu shares these workers, prefetching can't take more cpu than this no matter how many menus are open
+palette_pool = ThreadPoolExecutor(config.get("palette_workers", 2), thread_name_prefix="palette")
+# bytes imgchest uploads may hold in memory together, each one streams a chunk at a time through it
+upload_budget = ByteBudget(config.get("uploads", {}).get("max_in_flight", 16 * 1024**2))
+UPLOAD_CHUNK_SIZE: int = config.get("uploads", {}).get("chunk_size", 256 * 1024)
+# a local stand-in can be put here to try uploads without imgchest
+IMGCHEST_API: str = config.get("uploads", {}).get("api", "https://api.imgchest.com/v1")
+
+
+# PIL, numpy and colormap are imported by the functions that draw or crunch numbers, not when the cog loads,
+# a restart gets back on the gateway without paying for them
+@functools.cache
+def get_font() -> ImageFont.FreeTypeFont:
+    from PIL import ImageFont
+
+    return ImageFont.truetype(
+        "Assets/fonts/JetBrainsMono/JetBrainsMono-ExtraBold.ttf",
+        size=16,
+        layout_engine=ImageFont.Layout.BASIC,
+    )
 
 
 def get_images_url(text: str) -> list[str]:
@@ -43,41 +73,10 @@ def char_info_regex(char_info: dict[str, int], description: str) -> dict[str, in
     return char_info
 
 
-# hhttps://codepen.io/ifailatgithub/pen/mdrJdgb (outdated)
-# https://codepen.io/xr_/pen/oNaOxxB (updated fork)
 def get_value(claim_rank: int, like_rank: int, claimed_chars: int, keys: int) -> discord.Embed:
-    def keys_multiplier() -> float:
-        if keys < 1:
-            return 1
-        elif 1 <= keys < 3:
-            return 1 + 0.1 * (keys - 1)
-        elif 3 <= keys < 6:
-            return 1.1 + 0.1 * (keys - 3)
-        elif 6 <= keys < 10:
-            return 1.3 + 0.1 * (keys - 6)
-        else:
-            return 1.6 + 0.05 * (keys - 10)
-
-    def keys_bonus_value() -> int:
-        if 10 >= keys > 20:
-            return 15 * (keys // 5 - 1)
-        elif 20 >= keys > 35:
-            return 30 + 10 * (keys // 5 - 3)
-        elif 35 >= keys > 60:
-            return 60 + 5 * (keys // 5 - 6)
-        elif 60 >= keys > 300:
-            return 100 + 5 * (keys // 10 - 8)
-        elif keys >= 300:
-            return 210
-        else:
-            return 0
-
-    avg_rank = (claim_rank + like_rank) / 2
-    claim_multiplier = 1 + claimed_chars / 5500
-    base_value = math.floor((25000 * (avg_rank + 70) ** -0.75 + 20 + keys_bonus_value()) * claim_multiplier + 0.5)
-    kakera_value = math.floor(base_value * keys_multiplier() + 0.5)
+    base_value, multiplier, kakera = kakera_value(claim_rank, like_rank, claimed_chars, keys)
     embed = discord.Embed(color=discord.Color.brand_red())
-    description = f"Base Value: {base_value}\nKey Multiplier: {keys_multiplier():.2f}\nKakera Value: {kakera_value}"
+    description = f"Base Value: {base_value}\nKey Multiplier: {multiplier:.2f}\nKakera Value: {kakera}"
     embed.description = f"""
     Claim Rank: {claim_rank}
     Like Rank: {like_rank}
@@ -89,8 +88,117 @@ def get_value(claim_rank: int, like_rank: int, claimed_chars: int, keys: int) ->
     return embed
 
 
+# name, claim rank, like rank and optionally keys, split by commas, pipes, semicolons or tabs.
+# the numbers are matched from the end so names can contain the separators
+character_pattern = re.compile(
+    r"^[ \t]*(?P<name>.+?)[ \t]*[,|;\t][ \t]*#?(?P<claim>\d+)[ \t]*[,|;\t][ \t]*#?(?P<like>\d+)"
+    r"(?:[ \t]*[,|;\t][ \t]*(?P<keys>\d+))?[ \t]*$",
+    flags=re.MULTILINE,
+)
+VALUES_PER_PAGE = 20
+
+
+def value_table(text: str, claimed_chars: int) -> tuple[list[str], int, int]:
+    """Table rows of every character in ``text`` from the most to the least valuable, the total kakera
+    and how many lines weren't characters. Runs on the parser executor for long lists."""
+    import numpy as np
+
+    matches = list(character_pattern.finditer(text))
+    skipped = sum(1 for line in text.splitlines() if line.strip()) - len(matches)
+    if not matches:
+        return [], 0, skipped
+
+    names = [match["name"] for match in matches]
+    claim_ranks = np.fromiter((int(match["claim"]) for match in matches), dtype=np.int64, count=len(matches))
+    like_ranks = np.fromiter((int(match["like"]) for match in matches), dtype=np.int64, count=len(matches))
+    keys = np.fromiter((int(match["keys"] or 0) for match in matches), dtype=np.int64, count=len(matches))
+    base_values, multipliers, values = kakera_values(claim_ranks, like_ranks, claimed_chars, keys)
+
+    # stable, so characters worth the same stay in the order they were given
+    order = np.argsort(-values, kind="stable")
+    rows = [f"{values[i]:>6} {base_values[i]:>5} {multipliers[i]:>5.2f} {keys[i]:>4} {names[i]}" for i in order.tolist()]
+    return rows, int(values.sum()), skipped
+
+
+# the char_info key each sweep varies and the range a CharInfoView button sweeps at least
+SWEEP_AXES = {"keys": ("keys", 100), "claimed": ("claimed_chars", 10000)}
+MAX_SWEEP_POINTS = 20001
+
+
+def sweep_chart(char_info: dict[str, int], axis: str, start: int, stop: int) -> tuple[BytesIO, str]:
+    """Kakera value over ``start``..``stop`` of ``axis`` with the rest of ``char_info`` fixed, drawn as a
+    line chart, and a summary of it."""
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    field, _ = SWEEP_AXES[axis]
+    xs = np.arange(start, stop + 1, dtype=np.int64)
+    varied = {**char_info, field: xs}
+    _, _, values = kakera_values(varied["claim_rank"], varied["like_rank"], varied["claimed_chars"], varied["keys"])
+
+    width, height = 680, 360
+    left, right, top, bottom = 80, 20, 20, 60
+    plot_width, plot_height = width - left - right, height - top - bottom
+    low, high = int(values.min()), int(values.max())
+    span, x_span = max(high - low, 1), max(stop - start, 1)
+
+    def point(x: float, value: float) -> tuple[float, float]:
+        return left + (x - start) * plot_width / x_span, top + (high - value) * plot_height / span
+
+    font = get_font()
+    i = Image.new("RGBA", (width, height), "#2b2d31")
+    a = ImageDraw.Draw(i)
+    for tick in range(5):
+        value = low + span * tick / 4
+        _, y = point(start, value)
+        a.line((left, y, width - right, y), fill="#3f4147")
+        a.text((5, y - 8), f"{value:>7.0f}", fill="white", font=font)  # type: ignore
+        x, _ = point(start + x_span * tick / 4, low)
+        a.text((x - 20, height - bottom + 8), f"{start + x_span * tick / 4:.0f}", fill="white", font=font)  # type: ignore
+    a.text((left, height - 24), f"{axis} -> kakera value", fill="#b5bac1", font=font)  # type: ignore
+    # one vertex per pixel column is enough, thousands of points would only overdraw
+    shown = np.unique(np.r_[np.arange(0, len(xs), max(1, len(xs) // plot_width)), len(xs) - 1])
+    a.line(
+        [point(x, value) for x, value in zip(xs[shown].tolist(), values[shown].tolist(), strict=True)],
+        fill="#ed4245",
+        width=3,
+    )
+    current = char_info[field]
+    if start <= current <= stop:
+        x, y = point(current, values[current - start])
+        a.ellipse((x - 5, y - 5, x + 5, y + 5), fill="white", outline="#ed4245")
+
+    chart = BytesIO()
+    i.save(chart, "png")
+    chart.seek(0)
+    summary = (
+        f"{axis} {start}: {values[0]} kakera\n{axis} {stop}: {values[-1]} kakera\n"
+        f"highest: {high} kakera at {axis} {start + int(values.argmax())}"
+    )
+    return chart, summary
+
+
+async def send_sweep(
+    destination: commands.Context[Bot] | discord.Webhook, char_info: dict[str, int], axis: str, start: int, stop: int
+) -> None:
+    chart, summary = await asyncio.to_thread(sweep_chart, char_info, axis, start, stop)
+    embed = discord.Embed(color=discord.Color.brand_red(), description=f"```\n{summary}\n```")
+    embed.set_image(url="attachment://sweep.png")
+    embed.set_footer(text="Value calculations interpolated by Okami and LilJamJam")
+    file = discord.File(fp=chart, filename="sweep.png")
+    if isinstance(destination, discord.Webhook):
+        await destination.send(embed=embed, file=file, ephemeral=True)
+    else:
+        await destination.send(embed=embed, file=file)
+
+
 def processing(image: BytesIO) -> tuple[list[str], BytesIO]:
-    palette: list[str] = [rgb2hex(r, g, b) for r, g, b in fast_colorthief.get_palette(image, color_count=25, quality=1)]  # type: ignore
+    from colormap import rgb2hex  # type: ignore
+    from PIL import Image, ImageDraw
+
+    with metrics.timer("palette_seconds", mode=PALETTE_MODE):
+        colors = extract_palette(image, PALETTE_MODE, PALETTE_MAX_PIXELS)
+    palette: list[str] = [rgb2hex(r, g, b) for r, g, b in colors]  # type: ignore
 
     n = len(palette)
     cols = 4
@@ -100,6 +208,7 @@ def processing(image: BytesIO) -> tuple[list[str], BytesIO]:
     img_height = cell_height * rows
     img_width = cell_width * cols
 
+    font = get_font()
     i = Image.new("RGBA", (img_width, img_height))
     a = ImageDraw.Draw(i)
 
@@ -116,6 +225,16 @@ def processing(image: BytesIO) -> tuple[list[str], BytesIO]:
     return palette, palette_png
 
 
+async def get_palette(image: BytesIO) -> tuple[list[str], bytes]:
+    key = content_key(image.getvalue(), PALETTE_MODE, PALETTE_MAX_PIXELS)
+    entry = await palettes.fetch(key)
+    if entry is None:
+        palette, palette_png = await asyncio.get_running_loop().run_in_executor(palette_pool, processing, image)
+        entry = (palette, palette_png.getvalue())
+        await palettes.store(key, *entry)
+    return entry
+
+
 class ImgChestFlags(commands.FlagConverter):
     title: str | None = None
     anonymous: bool = False
@@ -170,6 +289,66 @@ class Utilities(commands.Cog):
         view = CharInfoView(char_info)
         view.message = await ctx.send(embed=embed, view=view)
 
+    @commands.command(aliases=["sweep"])
+    async def valuesweep(
+        self,
+        ctx: commands.Context[Bot],
+        axis: Literal["keys", "claimed"],
+        start: int,
+        stop: int,
+        claim_rank: int = 1,
+        like_rank: int = 1,
+        claimed_chars: int = 0,
+        keys: int = 0,
+    ) -> None:
+        """Chart the Kakera Value over a range of keys or claimed characters
+
+        __Notes__
+        - `sweep keys 0 100 <claim rank> <like rank> <claimed characters>`
+        - `sweep claimed 0 20000 <claim rank> <like rank> <claimed characters> <keys>`
+        - Reply to a character embed to use its ranks and keys
+        """
+        if not 0 <= start < stop or stop - start >= MAX_SWEEP_POINTS:
+            await ctx.send(f"the range has to go up from 0 or more and span less than {MAX_SWEEP_POINTS} values")
+            return
+
+        char_info = {"claim_rank": claim_rank, "like_rank": like_rank, "claimed_chars": claimed_chars, "keys": keys}
+        reply: discord.MessageReference | discord.DeletedReferencedMessage | None = ctx.message.reference
+        if (
+            reply
+            and isinstance(reply.resolved, discord.Message)
+            and reply.resolved.embeds
+            and reply.resolved.embeds[0].description
+        ):
+            char_info = char_info_regex(char_info, reply.resolved.embeds[0].description)
+        await send_sweep(ctx, char_info, axis, start, stop)
+
+    @commands.command(aliases=["bulkvalue"])
+    async def values(self, ctx: commands.Context[Bot], claimed_chars: int | None = 0, *, args: str | None = None) -> None:
+        """Calculate the Kakera Value of many characters at once
+
+        __Notes__
+        - One character per line: `name, claim rank, like rank, keys` (keys can be left out)
+        - `|`, `;` or tabs work as separators too
+        - A .txt or .csv attachment in the same format works too (up to 2MB)
+        """
+        text = args or ""
+        for attachment in ctx.message.attachments:
+            if attachment.filename.endswith((".txt", ".csv")) and attachment.size <= 2e6:
+                text += "\n" + (await attachment.read()).decode(errors="replace")
+
+        try:
+            rows, total, skipped = await ctx.bot.executor.run(len(text), value_table, text, claimed_chars or 0)
+        except ExecutorBusy as error:
+            await ctx.send(str(error))
+            return
+        if not rows:
+            await ctx.send("no characters found, one per line: `name, claim rank, like rank, keys`")
+            return
+
+        view = ValuePages(rows, total, claimed_chars or 0, skipped)
+        view.message = await ctx.send(embed=view.format_page(), view=view)
+
     @commands.command(aliases=["upload"])
     @commands.cooldown(60, 60)
     async def imgchest(self, ctx: commands.Context[Bot], attachments: Greedy[discord.Attachment]) -> None:
@@ -192,33 +371,38 @@ class Utilities(commands.Cog):
             await ctx.send("Total attachments size must be less than 99MB")
             return
 
-        data = FormData()
-        data.add_field("anonymous", "1")
-        data.add_field("nsfw", "true")
-        for attachment in checked_attachments:
-            data.add_field(
-                "images[]",
-                await attachment.read(),
-                filename=attachment.filename,
-                content_type=attachment.content_type,
+        progress = UploadProgress(sum(attachment.size for attachment in checked_attachments))
+        files = [
+            UploadFile(
+                attachment.url, attachment.size, attachment.filename, attachment.content_type or "application/octet-stream"
             )
+            for attachment in checked_attachments
+        ]
+        data = upload_form(ctx.bot.session, files, upload_budget, progress, UPLOAD_CHUNK_SIZE)
 
-        async with ctx.bot.session.post(
-            url="https://api.imgchest.com/v1/post",
-            headers={"Authorization": f"Bearer {ctx.bot.config['imgchest_key']}"},
-            data=data,
-        ) as response:
-            if response.status != 200:
-                await ctx.send(await response.text())
-                return
-
-            json = await response.json()
+        status = await ctx.send(progress.render())
+        reporter = asyncio.create_task(progress.report(status))
+        try:
+            with metrics.timer("http_seconds", target="imgchest"):
+                async with ctx.bot.session.post(
+                    url=f"{IMGCHEST_API}/post",
+                    headers={"Authorization": f"Bearer {ctx.bot.config['imgchest_key']}"},
+                    data=data,
+                ) as response:
+                    metrics.increment("http_responses", target="imgchest", status=str(response.status))
+                    if response.status != 200:
+                        await status.edit(content=await response.text())
+                        return
+
+                    json = await response.json()
+        except aiohttp.ClientError as error:
+            await status.edit(content=f"upload failed: {error}")
+            return
+        finally:
+            reporter.cancel()
 
         links = "\n".join([image["link"] for image in json["data"]["images"]])
-        await ctx.send(
-            f"https://imgchest.com/p/{json['data']['id']}\n\n{links}",
-            suppress_embeds=True,
-        )
+        await status.edit(content=f"https://imgchest.com/p/{json['data']['id']}\n\n{links}", suppress=True)
 
     @commands.command()
     async def limit(self, ctx: commands.Context[Bot], limit: int, *, args: str) -> None:
@@ -264,14 +448,19 @@ class Utilities(commands.Cog):
             await ctx.send("no image found")
             return
 
+        too_large: list[ImageTooLarge] = []
+
         async def get(url: str) -> None | tuple[str, BytesIO]:
-            async with ctx.bot.session.get(url) as response:
-                if response.status == 200 and response.url.name != "removed.png":
-                    return (url, BytesIO(await response.read()))
+            try:
+                body = await ctx.bot.fetcher.fetch(url)
+            except ImageTooLarge as error:
+                too_large.append(error)
+                return None
+            return (url, BytesIO(body)) if body else None
 
         entries: list[tuple[str, BytesIO]] = [i for i in await asyncio.gather(*[get(url) for url in urls if url]) if i]
         if not entries:
-            await ctx.send("invalid url")
+            await ctx.send(str(too_large[0]) if too_large else "invalid url")
             return
 
         formatter = MySource(entries, 1)
@@ -298,6 +487,59 @@ class CharInfoModal(ui.Modal, title="Update Values"):
         self.stop()
 
 
+class ValuePages(ui.View):
+    def __init__(self, rows: list[str], total: int, claimed_chars: int, skipped: int) -> None:
+        super().__init__(timeout=180)
+        self.rows = rows
+        self.total = total
+        self.claimed_chars = claimed_chars
+        self.skipped = skipped
+        self.current_page = 0
+        self.max_pages = math.ceil(len(rows) / VALUES_PER_PAGE)
+        self.message: discord.Message
+        if self.max_pages == 1:
+            self.remove_item(self.before_page)
+            self.remove_item(self.next_page)
+
+    def format_page(self) -> discord.Embed:
+        start = self.current_page * VALUES_PER_PAGE
+        rows = "\n".join(self.rows[start : start + VALUES_PER_PAGE])
+        embed = discord.Embed(color=discord.Color.brand_red())
+        embed.description = (
+            f"{len(self.rows)} characters, {self.total} kakera in total with {self.claimed_chars} claimed characters\n"
+            f"```\n{'kakera':>6} {'base':>5} {'mult':>5} {'keys':>4} name\n{rows}\n```"
+        )
+        footer = f"Page {self.current_page + 1} / {self.max_pages}"
+        if self.skipped:
+            footer += f" · {self.skipped} lines skipped"
+        embed.set_footer(text=footer)
+        return embed
+
+    @ui.button(emoji="<:RemLeft:1052054214634913882>", style=discord.ButtonStyle.secondary)
+    async def before_page(self, interaction: discord.Interaction, button: discord.ui.Button[Self]) -> None:
+        self.current_page = (self.current_page - 1) % self.max_pages
+        await interaction.response.edit_message(embed=self.format_page())
+
+    @ui.button(emoji="<:RamRight:1052054203901673482>", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button[Self]) -> None:
+        self.current_page = (self.current_page + 1) % self.max_pages
+        await interaction.response.edit_message(embed=self.format_page())
+
+    @ui.button(label="Quit", style=discord.ButtonStyle.red)
+    async def Quit(self, interaction: discord.Interaction, button: discord.ui.Button[Self]) -> None:
+        await interaction.response.defer()
+        await interaction.delete_original_response()
+        self.stop()
+
+    async def on_timeout(self) -> None:
+        for item in self.children:
+            item.disabled = True  # type: ignore
+        try:
+            await self.message.edit(view=self)
+        except discord.errors.NotFound:
+            pass
+
+
 class CharInfoView(ui.View):
     def __init__(self, char_info: dict[str, int]) -> None:
         self.char_info = char_info
@@ -321,6 +563,21 @@ class CharInfoView(ui.View):
         self.char_info["keys"] = int(modal.keys.value)
         await interaction.edit_original_response(embed=get_value(**self.char_info))
 
+    async def sweep(self, interaction: discord.Interaction, axis: str) -> None:
+        # from 0 to twice the current value, so the chart shows where the character is and where it could go
+        field, minimum = SWEEP_AXES[axis]
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        stop = min(max(minimum, self.char_info[field] * 2), MAX_SWEEP_POINTS - 1)
+        await send_sweep(interaction.followup, self.char_info, axis, 0, stop)
+
+    @ui.button(label="Sweep Keys", style=discord.ButtonStyle.secondary)
+    async def sweep_keys(self, interaction: discord.Interaction, button: discord.ui.Button[Self]) -> None:
+        await self.sweep(interaction, "keys")
+
+    @ui.button(label="Sweep Claimed", style=discord.ButtonStyle.secondary)
+    async def sweep_claimed(self, interaction: discord.Interaction, button: discord.ui.Button[Self]) -> None:
+        await self.sweep(interaction, "claimed")
+
     @ui.button(label="Quit", style=discord.ButtonStyle.red)
     async def Quit(self, interaction: discord.Interaction, button: discord.ui.Button[Self]) -> None:
         await interaction.response.defer()
@@ -345,6 +602,8 @@ class MyMenuPages(ui.View, menus.MenuPages):
         self.ctx = None
         self.palette_png: BytesIO
         self.message: discord.Message
+        # page number -> its palette, computed or being computed
+        self.palettes: dict[int, asyncio.Task[tuple[list[str], bytes]]] = {}
 
     async def start(
         self,
@@ -358,6 +617,29 @@ class MyMenuPages(ui.View, menus.MenuPages):
         self.ctx = ctx
         self.message: discord.Message = await self.send_initial_message(ctx, ctx.channel)  # type: ignore
 
+    def palette(self, page_number: int) -> asyncio.Task[tuple[list[str], bytes]]:
+        task = self.palettes.get(page_number)
+        if task is None or task.cancelled():
+            _, image = self._source.entries[page_number]  # type: ignore
+            task = self.palettes[page_number] = asyncio.create_task(get_palette(image))
+            # a prefetched page may never be shown, don't let its error go unretrieved
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return task
+
+    def prefetch(self, page_number: int) -> None:
+        # the pages the buttons lead to next, navigation wraps around so the previous page too
+        max_pages = self._source.get_max_pages()
+        for offset in (*range(1, PALETTE_PREFETCH + 1), -1):
+            self.palette((page_number + offset) % max_pages)
+
+    def stop(self) -> None:
+        for task in self.palettes.values():
+            task.cancel()
+        super().stop()
+
+    async def on_timeout(self) -> None:
+        self.stop()
+
     async def _get_kwargs_from_page(self, page: int) -> dict[str, str | discord.Embed | discord.ui.View | None]:
         """This method calls ListPageSource.format_page class"""
         value: dict[str, str | discord.Embed | discord.ui.View | None] = await super()._get_kwargs_from_page(page)  # type: ignore
@@ -400,8 +682,9 @@ class MySource(menus.ListPageSource):
         self.Dropdown = None
 
     async def format_page(self, menu: MyMenuPages, page: tuple[str, BytesIO]) -> discord.Embed:
-        url, image_bytes = page
-        colors, palette_png = await asyncio.to_thread(processing, image_bytes)
+        url, _ = page
+        colors, palette_png = await menu.palette(menu.current_page)
+        menu.prefetch(menu.current_page)
         embed = discord.Embed(color=discord.Color.dark_embed())
         embed.set_image(url=url)
         options = [discord.SelectOption(label=color) for color in colors]
@@ -410,7 +693,8 @@ class MySource(menus.ListPageSource):
 
         self.Dropdown = Dropdown(options, embed)
         menu.add_item(self.Dropdown)
-        menu.palette_png = palette_png
+        # a fresh file object for every page, the cached bytes are shared between menus
+        menu.palette_png = BytesIO(palette_png)
         maximum = self.get_max_pages()
         if maximum > 1:
             footer = f"Page {menu.current_page + 1} / {maximum}"
@@ -440,3 +724,8 @@ class Dropdown(discord.ui.Select[MyMenuPages]):
 
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(Utilities(bot))
+    metrics.register("palettes", palettes.stats)
+
+
+async def teardown(bot: commands.Bot) -> None:
+    palette_pool.shutdown(wait=False, cancel_futures=True)
@@ -1,28 +1,70 @@
 # main.py
+import asyncio
+import contextlib
 import datetime
 import logging
+import time
+from collections.abc import Iterator
+from typing import Any
 
-import aiofiles
 import aiohttp
-import asqlite
 import discord
 import starlight  # type: ignore
 import toml
-from asqlite import Pool
+from aiohttp import web
+from discord import app_commands
 from discord.ext import commands
 
 from cogs import EXTENSIONS
+from utils.executor import ParserExecutor
+from utils.fetcher import ImageFetcher
+from utils.ipc import RelayClient
+from utils.metrics import metrics, serve
+from utils.prefixes import PrefixCache, matcher
+from utils.profiles import cache_options
+from utils.storage import Storage
 
 config = toml.load("config.toml")
 default_prefix = config["PREFIX"]
-handler = logging.FileHandler(filename="discord.log", encoding="utf-8", mode="w")
 
 
-class Bot(commands.Bot):
-    def __init__(self) -> None:
+class CommandTree(app_commands.CommandTree):
+    # slash commands (hybrid ones too) and context menus never go through Bot.invoke, they're timed from here:
+    # the interaction is stamped when the tree receives it and recorded once it completed or failed
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["started"] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError) -> None:
+        record_interaction(interaction, "failed")
+        await super().on_error(interaction, error)
+
+
+def record_interaction(interaction: discord.Interaction, status: str) -> None:
+    started = interaction.extras.pop("started", None)
+    if started is None or interaction.command is None:
+        return
+    name = interaction.command.qualified_name
+    metrics.observe("command_seconds", time.perf_counter() - started, command=name)
+    metrics.increment("commands", command=name, status=status)
+
+
+class Bot(commands.AutoShardedBot):
+    def __init__(
+        self,
+        *,
+        shard_ids: list[int] | None = None,
+        shard_count: int | None = None,
+        cluster: int = 0,
+        relay: tuple[str, int] | None = None,
+    ) -> None:
+        # started with `python main.py` this process runs every shard discord recommends, cluster.py splits them up
         super().__init__(
+            shard_ids=shard_ids,
+            shard_count=shard_count,
             command_prefix=get_prefix,
-            intents=discord.Intents.all(),
+            tree_cls=CommandTree,
+            **cache_options(config.get("profile", "full")),
             case_insensitive=True,
             strip_after_prefix=True,
             activity=discord.Game(name=f"{default_prefix}help"),
@@ -38,71 +80,146 @@ class Bot(commands.Bot):
                 },  # type: ignore
             ),
         )
-        self.pool: Pool
+        self.storage: Storage
         self.session: aiohttp.ClientSession
+        self.fetcher: ImageFetcher
+        self.metrics_runner: web.AppRunner | None = None
         self.config = config
-        self.prefixes: dict[int, str] = {}
+        self.prefixes = PrefixCache(default_prefix, config.get("prefix_cache_size", 10000))
         self.default_prefix: str = default_prefix
-        self.launch_time = datetime.datetime.now(datetime.timezone.utc)
+        self.mention_prefixes: tuple[str, ...] = ()
+        self.launch_time = datetime.datetime.now(datetime.UTC)
+        self.executor = ParserExecutor(**config.get("executor", {}))
+        # seconds each startup step took, printed once the bot is ready
+        self.startup_times: dict[str, float] = {}
+        self.cluster = cluster
+        # the other clusters' prefix changes come in over the relay, ours go out over it
+        self.relay = RelayClient(*relay, cluster) if relay else None
+        # a failing hybrid command reports to on_command_error instead of the tree's on_error
+        self.add_listener(self.on_hybrid_command_error, "on_command_error")
 
     async def setup_hook(self) -> None:
         print(f"Logged on as {self.user} (ID: {self.user.id})")  # type: ignore
-        for extension in EXTENSIONS:
-            await self.load_extension(extension)
-        await self.load_extension("jishaku")
+        with self.startup_step("setup_hook"):
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector())
+            self.fetcher = ImageFetcher(self.session, **config.get("fetcher", {}))
+            # what commands.when_mentioned returns, built once instead of for every message
+            self.mention_prefixes = (f"<@{self.user.id}> ", f"<@!{self.user.id}> ")  # type: ignore
+            if self.relay:
+                self.relay.handlers["prefixes"] = self.apply_prefixes
+                self.relay.start()
+
+            # none of these wait on each other: the database migrates while the cogs import
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self.load_extensions())
+                group.create_task(self.open_storage())
+                group.create_task(self.start_metrics())
         print("Loaded cogs")
-        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector())
 
-        self.pool = await asqlite.create_pool("database.db")
-        async with self.pool.acquire() as conn, aiofiles.open("schema.sql") as fp:
-            await conn.executescript(await fp.read())
-            await conn.commit()
+    @contextlib.contextmanager
+    def startup_step(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_times[name] = time.perf_counter() - start
+
+    async def load_extensions(self) -> None:
+        # one after another, the order cogs are added in is the order the help command lists them in
+        with self.startup_step("extensions"):
+            for extension in (*EXTENSIONS, "jishaku"):
+                with self.startup_step(extension):
+                    await self.load_extension(extension)
+
+    async def open_storage(self) -> None:
+        with self.startup_step("storage"):
+            self.storage = await Storage.open(**config.get("storage", {}))
+            self.prefixes.load(await self.storage.fetch_prefixes())
+
+    async def start_metrics(self) -> None:
+        metrics.register("executor", self.executor.stats)
+        metrics.register("fetcher", self.fetcher.stats)
+        metrics.register("storage", lambda: {"flushes": self.storage.flushes, "written": self.storage.written})
+        metrics.register("prefixes", lambda: {"cached": len(self.prefixes), "complete": int(self.prefixes.complete)})
+        metrics_config = config.get("metrics", {})
+        if metrics_config.get("port"):
+            # every cluster serves its own metrics, on the configured port plus its number
+            port = metrics_config["port"] + self.cluster
+            with self.startup_step("metrics"):
+                self.metrics_runner = await serve(metrics_config.get("host", "127.0.0.1"), port)
+
+    async def on_ready(self) -> None:
+        # on_ready fires again after every reconnect that couldn't resume, the report is for the cold start
+        if "ready" in self.startup_times:
+            return
+        self.startup_times["ready"] = (datetime.datetime.now(datetime.UTC) - self.launch_time).total_seconds()
+        report = "\n".join(f"  {name:<24} {seconds * 1000:>8.1f} ms" for name, seconds in self.startup_times.items())
+        print(f"Startup times:\n{report}")
+
+    async def guild_prefixes(self, guild_id: int) -> tuple[str, ...]:
+        prefixes = self.prefixes.get(guild_id)
+        if prefixes is None:  # only when the cache couldn't hold every guild
+            # guilds without rows use the default prefix, cache that too so they aren't looked up again
+            prefixes = matcher(await self.storage.fetch_prefix(guild_id)) or self.prefixes.default
+            self.prefixes.set(guild_id, prefixes)
+        return prefixes
+
+    def publish_prefixes(self, guild_id: int, prefixes: tuple[str, ...]) -> None:
+        # the new prefixes themselves are sent, the other clusters don't have to read them back from the database
+        # (which may not have them yet, writes are flushed in batches)
+        if self.relay:
+            self.relay.publish("prefixes", guild=guild_id, prefixes=list(prefixes))
+
+    def apply_prefixes(self, message: dict[str, Any]) -> None:
+        self.prefixes.set(message["guild"], message["prefixes"])
+
+    async def process_commands(self, message: discord.Message) -> None:
+        if message.author.bot:
+            return
+        # almost every message the bot sees isn't a command, drop those before get_context builds a Context
+        prefixes = await self.guild_prefixes(message.guild.id) if message.guild else self.prefixes.default
+        if not message.content.startswith(prefixes) and not message.content.startswith(self.mention_prefixes):
+            return
+        await super().process_commands(message)
+
+    async def invoke(self, ctx: commands.Context[Any]) -> None:
+        if ctx.command is None:
+            await super().invoke(ctx)
+            return
+        # errors are handled (and swallowed) inside invoke, command_failed is how they show up here
+        name = ctx.command.qualified_name
+        with metrics.timer("command_seconds", command=name):
+            await super().invoke(ctx)
+        metrics.increment("commands", command=name, status="failed" if ctx.command_failed else "ok")
+
+    async def on_app_command_completion(
+        self, interaction: discord.Interaction, command: app_commands.Command[Any, ..., Any] | app_commands.ContextMenu
+    ) -> None:
+        record_interaction(interaction, "ok")
+
+    async def on_hybrid_command_error(self, ctx: commands.Context[Any], error: commands.CommandError) -> None:
+        # prefix invocations are already recorded by invoke
+        if ctx.interaction is not None:
+            record_interaction(ctx.interaction, "failed")
 
     async def close(self) -> None:
-        await self.pool.close()
+        self.executor.shutdown()
+        if self.relay:
+            await self.relay.close()
+        if self.metrics_runner:
+            await self.metrics_runner.cleanup()
+        await self.storage.close()
         await self.session.close()
         await super().close()
 
 
 # https://mystb.in/PoundJpgQuarter
 async def get_prefix(bot: Bot, message: discord.Message) -> list[str]:
-    if not message.guild or not bot.user:  # check if dm
-        return commands.when_mentioned_or(default_prefix)(bot, message)  # return default prefix
-    try:
-        return commands.when_mentioned_or(bot.prefixes[message.guild.id])(bot, message)
-
-    except KeyError:
-        async with bot.pool.acquire() as conn:
-            cursor = await conn.execute(
-                "SELECT prefix FROM prefixes WHERE guild_id = ?",
-                (message.guild.id,),
-            )
-            prefix = await cursor.fetchone()
-            await conn.commit()
-
-        if prefix:  # if it's in the database,
-            bot.prefixes.update({message.guild.id: prefix["prefix"]})  # cache it
-            return commands.when_mentioned_or(bot.prefixes.get(message.guild.id, default_prefix))(bot, message)
-
-        else:  # if not in the database,
-            # insert into the database
-            async with bot.pool.acquire() as conn:
-                await conn.execute(
-                    """
-                    INSERT INTO
-                        prefixes (guild_id, prefix)
-                    VALUES
-                        (?, ?)
-                    ON CONFLICT (guild_id) DO UPDATE
-                    SET
-                    prefix = excluded.prefix
-                    """,
-                    (message.guild.id, default_prefix),
-                )
-                await conn.commit()
-            bot.prefixes.update({message.guild.id: default_prefix})  # after inserting, cache it
-            return commands.when_mentioned_or(bot.prefixes.get(message.guild.id, default_prefix))(bot, message)
+    if not message.guild:  # dms use the default prefix
+        return [*bot.mention_prefixes, *bot.prefixes.default]
+    return [*bot.mention_prefixes, *await bot.guild_prefixes(message.guild.id)]
 
 
 if __name__ == "__main__":
+    handler = logging.FileHandler(filename="discord.log", encoding="utf-8", mode="w")
     Bot().run(config["TOKEN"], log_handler=handler)
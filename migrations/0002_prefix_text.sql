@@ -0,0 +1,21 @@
+-- guild ids are discord snowflakes, not autoincrement keys, and prefix was declared as an unknown type
+CREATE TABLE IF NOT EXISTS
+    prefixes_new (
+        guild_id INTEGER PRIMARY KEY,
+        prefix TEXT NOT NULL
+    );
+
+INSERT INTO
+    prefixes_new (guild_id, prefix)
+SELECT
+    guild_id,
+    prefix
+FROM
+    prefixes
+WHERE
+    prefix IS NOT NULL;
+
+DROP TABLE prefixes;
+
+ALTER TABLE prefixes_new
+RENAME TO prefixes;
@@ -0,0 +1,20 @@
+-- a guild can have several prefixes, one row each
+CREATE TABLE IF NOT EXISTS
+    prefixes_new (
+        guild_id INTEGER NOT NULL,
+        prefix TEXT NOT NULL,
+        PRIMARY KEY (guild_id, prefix)
+    ) WITHOUT ROWID;
+
+INSERT INTO
+    prefixes_new (guild_id, prefix)
+SELECT
+    guild_id,
+    prefix
+FROM
+    prefixes;
+
+DROP TABLE prefixes;
+
+ALTER TABLE prefixes_new
+RENAME TO prefixes;
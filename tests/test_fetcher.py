@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from utils.fetcher import ImageFetcher, ImageTooLarge
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+    from pathlib import Path
+
+    Check = Callable[[ImageFetcher, TestServer, list[dict[str, str]]], Awaitable[None]]
+
+BODY = b"\x89PNG" + b"x" * 1000
+ETAG = '"v1"'
+
+
+def stand_in() -> tuple[web.Application, list[dict[str, str]]]:
+    # a cdn that answers 304 when the client already has the current version
+    requests: list[dict[str, str]] = []
+
+    async def image(request: web.Request) -> web.Response:
+        requests.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == ETAG:
+            return web.Response(status=304, headers={"ETag": ETAG})
+        return web.Response(body=BODY, headers={"ETag": ETAG})
+
+    async def large(request: web.Request) -> web.Response:
+        return web.Response(body=b"x" * 4096)
+
+    app = web.Application()
+    app.router.add_get("/image.png", image)
+    app.router.add_get("/large.png", large)
+    return app, requests
+
+
+def run(check: Check, **options: Any) -> None:
+    async def main() -> None:
+        app, requests = stand_in()
+        async with TestServer(app) as server, aiohttp.ClientSession() as session:
+            fetcher = ImageFetcher(session, **options)
+            await check(fetcher, server, requests)
+
+    asyncio.run(main())
+
+
+def test_revalidates_cached_body(tmp_path: Path) -> None:
+    async def check(fetcher: ImageFetcher, server: TestServer, requests: list[dict[str, str]]) -> None:
+        url = str(server.make_url("/image.png"))
+        assert await fetcher.fetch(url) == BODY
+        assert await fetcher.fetch(url) == BODY
+
+        assert "If-None-Match" not in requests[0]
+        assert requests[1]["If-None-Match"] == ETAG
+        assert fetcher.stats() == {
+            "downloads": 1,
+            "revalidated": 1,
+            "too_large": 0,
+            "cached": 1,
+            "cache_bytes": len(BODY),
+        }
+        assert sorted(path.suffix for path in tmp_path.iterdir()) == [".body", ".json"]
+
+    run(check, cache_path=str(tmp_path))
+
+
+def test_cache_survives_restart(tmp_path: Path) -> None:
+    async def check(fetcher: ImageFetcher, server: TestServer, requests: list[dict[str, str]]) -> None:
+        url = str(server.make_url("/image.png"))
+        await fetcher.fetch(url)
+        # a new fetcher over the same directory, like after a restart
+        restarted = ImageFetcher(fetcher.session, cache_path=str(tmp_path))
+        assert await restarted.fetch(url) == BODY
+        assert restarted.stats()["revalidated"] == 1
+        assert restarted.stats()["downloads"] == 0
+
+    run(check, cache_path=str(tmp_path))
+
+
+def test_without_cache_path() -> None:
+    async def check(fetcher: ImageFetcher, server: TestServer, requests: list[dict[str, str]]) -> None:
+        url = str(server.make_url("/image.png"))
+        await fetcher.fetch(url)
+        await fetcher.fetch(url)
+        assert all("If-None-Match" not in headers for headers in requests)
+        assert fetcher.stats()["downloads"] == 2
+
+    run(check)
+
+
+def test_too_large() -> None:
+    async def check(fetcher: ImageFetcher, server: TestServer, requests: list[dict[str, str]]) -> None:
+        with pytest.raises(ImageTooLarge):
+            await fetcher.fetch(str(server.make_url("/large.png")))
+        assert fetcher.stats()["too_large"] == 1
+
+    run(check, max_bytes=1024)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from utils.uploads import ByteBudget, UploadFile, UploadProgress, upload_form
+
+FILES = {"a.png": os.urandom(300_000), "b.gif": os.urandom(70_000)}
+
+
+class RecordingBudget(ByteBudget):
+    def __init__(self, limit: int) -> None:
+        super().__init__(limit)
+        self.max_used = 0
+
+    async def acquire(self, size: int) -> int:
+        granted = await super().acquire(size)
+        self.max_used = max(self.max_used, self.used)
+        return granted
+
+
+def stand_in() -> tuple[web.Application, dict[str, object]]:
+    # discord's cdn and imgchest's api on one local server
+    seen: dict[str, object] = {"files": {}}
+
+    async def cdn(request: web.Request) -> web.Response:
+        return web.Response(body=FILES[request.match_info["name"]])
+
+    async def post(request: web.Request) -> web.Response:
+        seen["content_length"] = request.content_length
+        seen["authorization"] = request.headers.get("Authorization")
+        reader = await request.multipart()
+        while part := await reader.next():
+            body = bytearray()
+            while chunk := await part.read_chunk(8192):  # type: ignore
+                body += chunk
+            if part.filename:  # type: ignore
+                seen["files"][part.filename] = bytes(body)  # type: ignore
+        return web.json_response({"data": {"id": "fake", "images": [{"link": f"/i/{name}"} for name in seen["files"]]}})  # type: ignore
+
+    app = web.Application()
+    app.router.add_get("/cdn/{name}", cdn)
+    app.router.add_post("/v1/post", post)
+    return app, seen
+
+
+def test_upload_streams_to_fake_imgchest() -> None:
+    async def main() -> None:
+        budget = RecordingBudget(64 * 1024)
+        progress = UploadProgress(sum(map(len, FILES.values())))
+        app, seen = stand_in()
+        async with TestServer(app) as server, aiohttp.ClientSession() as session:
+            files = [
+                UploadFile(str(server.make_url(f"/cdn/{name}")), len(body), name, "image/png")
+                for name, body in FILES.items()
+            ]
+            data = upload_form(session, files, budget, progress, 16 * 1024)
+            async with session.post(
+                server.make_url("/v1/post"), data=data, headers={"Authorization": "Bearer key"}
+            ) as response:
+                assert response.status == 200
+                json = await response.json()
+
+        assert seen["files"] == FILES
+        # the attachment sizes are known, so the multipart body had a Content-Length instead of being chunked
+        assert seen["content_length"] is not None
+        assert seen["authorization"] == "Bearer key"
+        assert 0 < budget.max_used <= budget.limit
+        assert budget.used == 0
+        assert not budget.waiters
+        assert progress.sent == progress.total
+        assert json["data"]["id"] == "fake"
+
+    asyncio.run(main())
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from typing import TYPE_CHECKING
+
+import discord
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable
+
+log = logging.getLogger(__name__)
+
+
+class DeliveryQueueFull(Exception):
+    def __init__(self, queued: int) -> None:
+        self.queued = queued
+        super().__init__(f"you already have {queued} messages on their way, try again once they arrived")
+
+
+class Delivery:
+    """Pages on their way to one user's DMs and the ephemeral messages showing how far along they are."""
+
+    def __init__(self, key: Hashable, pages: list[str]) -> None:
+        self.key = key
+        self.pages = pages
+        self.sent = 0
+        self.error: str | None = None
+        self.watchers: list[discord.InteractionMessage | discord.WebhookMessage] = []
+        self.finished = asyncio.Event()
+
+    def render(self, position: int = 0) -> str:
+        if self.error:
+            return f"stopped after {self.sent}/{len(self.pages)} messages: {self.error}"
+        if self.finished.is_set():
+            return f"sent {len(self.pages)} messages"
+        if position:
+            return f"{len(self.pages)} messages queued behind {position} other list{'s' * (position > 1)}"
+        return f"sending {self.sent}/{len(self.pages)} messages"
+
+
+class DeliveryQueue:
+    """Sends exported pages to users' DMs in the background, one worker per user.
+
+    Every user's DM channel is its own rate limit bucket, a worker paces its sends to at most ``rate``
+    every ``per`` seconds so the bucket is never exhausted (discord.py still waits out any 429),
+    and at most ``max_concurrent`` sends are in flight across every user. A user can't have more
+    than ``max_pages`` pages waiting, past that new exports are refused until the queue drains.
+    Submitting an export that's already queued or being sent joins it instead of sending it twice.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrent: int = 4,
+        rate: int = 5,
+        per: float = 5,
+        max_pages: int = 500,
+        interval: float = 2,
+    ) -> None:
+        self.rate = rate
+        self.per = per
+        self.max_pages = max_pages
+        self.interval = interval
+        self.sending = asyncio.Semaphore(max_concurrent)
+        # user id -> deliveries in order, the first one is being sent
+        self.queues: dict[int, deque[Delivery]] = {}
+        self.workers: dict[int, asyncio.Task[None]] = {}
+        self.delivered = 0
+        self.failed = 0
+        self.joined = 0
+
+    def queued_pages(self, user_id: int) -> int:
+        return sum(len(delivery.pages) - delivery.sent for delivery in self.queues.get(user_id, ()))
+
+    def find(self, user_id: int, key: Hashable) -> tuple[Delivery, int] | None:
+        for position, delivery in enumerate(self.queues.get(user_id, ())):
+            if delivery.key == key:
+                return delivery, position
+        return None
+
+    def submit(self, user: discord.abc.User, key: Hashable, pages: list[str]) -> tuple[Delivery, int, bool]:
+        """The delivery of ``pages``, how many deliveries are ahead of it and whether it was already queued.
+
+        Raises ``DeliveryQueueFull`` when the user already has too many pages waiting."""
+        found = self.find(user.id, key)
+        if found:
+            self.joined += 1
+            return *found, True
+        queued = self.queued_pages(user.id)
+        if queued + len(pages) > self.max_pages:
+            raise DeliveryQueueFull(queued)
+
+        delivery = Delivery(key, pages)
+        queue = self.queues.setdefault(user.id, deque())
+        queue.append(delivery)
+        if user.id not in self.workers:
+            self.workers[user.id] = asyncio.create_task(self.work(user))
+        return delivery, len(queue) - 1, False
+
+    async def watch(self, delivery: Delivery, message: discord.InteractionMessage | discord.WebhookMessage) -> None:
+        delivery.watchers.append(message)
+        if delivery.finished.is_set():  # it finished while the status message was being sent
+            await self.show(delivery)
+
+    async def work(self, user: discord.abc.User) -> None:
+        queue = self.queues[user.id]
+        # send times of the last `rate` messages, the next one waits until the oldest is `per` seconds old
+        recent: deque[float] = deque(maxlen=self.rate)
+        try:
+            while queue:
+                delivery = queue[0]
+                reporter = asyncio.create_task(self.report(delivery))
+                try:
+                    await self.deliver(user, delivery, recent)
+                except Exception:
+                    # one broken delivery doesn't take the ones queued behind it down too
+                    log.exception("failed to deliver %s to %s", delivery.key, user.id)
+                    delivery.error = "something went wrong"
+                    self.failed += 1
+                finally:
+                    delivery.finished.set()
+                    reporter.cancel()
+                    queue.popleft()
+                await self.show(delivery)
+                # the ones still queued now have one less delivery in front of them
+                for position, waiting in enumerate(queue):
+                    await self.show(waiting, position)
+        finally:
+            del self.queues[user.id]
+            del self.workers[user.id]
+
+    async def deliver(self, user: discord.abc.User, delivery: Delivery, recent: deque[float]) -> None:
+        for page in delivery.pages[delivery.sent :]:
+            if len(recent) == self.rate:
+                await asyncio.sleep(recent[0] + self.per - time.monotonic())
+            async with self.sending:
+                try:
+                    await user.send(page)
+                except discord.Forbidden:
+                    delivery.error = "your DMs are closed"
+                except discord.HTTPException as error:
+                    delivery.error = error.text or str(error)
+            if delivery.error:
+                self.failed += 1
+                return
+            recent.append(time.monotonic())
+            delivery.sent += 1
+        self.delivered += 1
+
+    async def report(self, delivery: Delivery) -> None:
+        # edited on an interval instead of per message, the edits would compete with the sends otherwise
+        while True:
+            await self.show(delivery)
+            await asyncio.sleep(self.interval)
+
+    async def show(self, delivery: Delivery, position: int = 0) -> None:
+        content = delivery.render(position)
+        for message in list(delivery.watchers):
+            try:
+                await message.edit(content=content)
+            except discord.HTTPException:
+                # the interaction token expired (15 minutes) or the message is gone
+                with contextlib.suppress(ValueError):
+                    delivery.watchers.remove(message)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "users": len(self.queues),
+            "queued_pages": sum(self.queued_pages(user_id) for user_id in self.queues),
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "joined": self.joined,
+        }
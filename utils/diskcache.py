@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from utils.lru import ByteLRU
+
+log = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """Entries kept in a directory, each one a data file and a small metadata file next to it.
+
+    The data files are bounded by ``max_bytes``, least recently used first (the mtime is the recency,
+    it orders the entries again after a restart). Files are written to a temporary name and renamed,
+    so a crash never leaves a half written entry behind. Reads and writes run on a thread, one at a
+    time so the index stays consistent.
+    """
+
+    def __init__(self, path: str, *, max_bytes: int, data_suffix: str, meta_suffix: str) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.data_suffix = data_suffix
+        self.meta_suffix = meta_suffix
+        # the data bytes of every key on disk, scanned on first use
+        self.index: ByteLRU[str, None] | None = None
+        self.lock = asyncio.Lock()
+
+    @property
+    def stored_bytes(self) -> int:
+        return self.index.stored_bytes if self.index is not None else 0
+
+    async def get(self, key: str) -> tuple[bytes, str] | None:
+        async with self.lock:
+            return await asyncio.to_thread(self.read, key)
+
+    async def put(self, key: str, data: bytes, meta: str) -> None:
+        try:
+            async with self.lock:
+                await asyncio.to_thread(self.write, key, data, meta)
+        except OSError:
+            log.exception("failed to write %s to %s", key, self.path)
+
+    def scan(self) -> ByteLRU[str, None]:
+        if self.index is None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.index = ByteLRU(self.max_bytes)
+            for path in sorted(self.path.glob(f"*{self.data_suffix}"), key=lambda path: path.stat().st_mtime):
+                self.index.put(path.stem, None, path.stat().st_size)
+        return self.index
+
+    def read(self, key: str) -> tuple[bytes, str] | None:
+        index = self.scan()
+        if key not in index:
+            return None
+        data_path = self.path / f"{key}{self.data_suffix}"
+        try:
+            data = data_path.read_bytes()
+            meta = (self.path / f"{key}{self.meta_suffix}").read_text()
+            os.utime(data_path)
+        except OSError:
+            return None
+        index.touch(key)
+        return data, meta
+
+    def write(self, key: str, data: bytes, meta: str) -> None:
+        index = self.scan()
+        # the metadata goes first, a data file on disk always has its metadata next to it
+        self.replace(self.path / f"{key}{self.meta_suffix}", meta.encode())
+        self.replace(self.path / f"{key}{self.data_suffix}", data)
+        index.put(key, None, len(data))
+        for old, _ in index.evict():
+            for suffix in (self.data_suffix, self.meta_suffix):
+                (self.path / f"{old}{suffix}").unlink(missing_ok=True)
+
+    @staticmethod
+    def replace(path: Path, content: bytes) -> None:
+        temporary = path.with_name(f"{path.name}.tmp")
+        temporary.write_bytes(content)
+        temporary.replace(path)
+
+    def __len__(self) -> int:
+        return len(self.index or ())
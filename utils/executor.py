@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Literal, TypeVar
+
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+T = TypeVar("T")
+
+
+class ExecutorBusy(Exception):
+    def __init__(self) -> None:
+        super().__init__("too many lists are being parsed right now, try again in a moment")
+
+
+def timed_call(func: Callable[..., T], *args: Any) -> tuple[T, float]:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class ParserExecutor:
+    """Runs parsers inline for small inputs and on a worker pool for large ones.
+
+    ``size`` is the length of the text the call works on, anything under ``inline_limit``
+    is cheaper to run on the event loop than to hand over to a worker.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        max_queue: int = 8,
+        inline_limit: int = 4000,
+        kind: Literal["thread", "process"] = "thread",
+    ) -> None:
+        self.inline_limit = inline_limit
+        self.max_pending = workers + max_queue
+        self.pool: Executor = (
+            ProcessPoolExecutor(workers) if kind == "process" else ThreadPoolExecutor(workers, thread_name_prefix="parser")
+        )
+        self.pending = 0
+        self.inline_calls = 0
+        self.inline_seconds = 0.0
+        self.offloaded_calls = 0
+        self.offloaded_seconds = 0.0
+        self.queued_seconds = 0.0
+        self.rejected = 0
+
+    def offloads(self, size: int) -> bool:
+        return size >= self.inline_limit
+
+    async def run(self, size: int, func: Callable[..., T], *args: Any, label: str = "") -> T:
+        # label names the parser in the metrics when func only wraps it
+        label = label or func.__name__
+        if not self.offloads(size):
+            result, elapsed = timed_call(func, *args)
+            self.inline_calls += 1
+            self.inline_seconds += elapsed
+            metrics.observe("parser_seconds", elapsed, parser=label, mode="inline")
+            return result
+
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            metrics.increment("parser_rejected", parser=label)
+            raise ExecutorBusy
+
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            result, elapsed = await asyncio.get_running_loop().run_in_executor(self.pool, timed_call, func, *args)
+        finally:
+            self.pending -= 1
+        self.offloaded_calls += 1
+        self.offloaded_seconds += elapsed
+        self.queued_seconds += time.perf_counter() - start - elapsed
+        metrics.observe("parser_seconds", elapsed, parser=label, mode="offloaded")
+        metrics.observe("parser_queue_seconds", time.perf_counter() - start - elapsed, parser=label)
+        return result
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "pending": self.pending,
+            "inline_calls": self.inline_calls,
+            "inline_seconds": self.inline_seconds,
+            "offloaded_calls": self.offloaded_calls,
+            "offloaded_seconds": self.offloaded_seconds,
+            "queued_seconds": self.queued_seconds,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
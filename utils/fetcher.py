@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import defaultdict
+
+import aiohttp
+from yarl import URL
+
+from utils.diskcache import DiskCache
+from utils.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+
+class ImageTooLarge(Exception):
+    def __init__(self, url: str, max_bytes: int) -> None:
+        self.url = url
+        self.max_bytes = max_bytes
+        super().__init__(f"image is larger than {max_bytes / 1024**2:g}MB")
+
+
+class ImageFetcher:
+    """Downloads images for the commands, shared by every cog.
+
+    Bodies are streamed and given up on past ``max_bytes`` (straight away when ``Content-Length``
+    already says so), at most ``per_host`` requests run against the same host and each one gets
+    ``timeout`` seconds. With a ``cache_path`` bodies are kept on disk keyed by url (bounded by
+    ``cache_max_bytes``, least recently used first) and revalidated with ETag/Last-Modified.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        *,
+        max_bytes: int = 8 * 1024**2,
+        timeout: float = 15,
+        per_host: int = 4,
+        chunk_size: int = 64 * 1024,
+        cache_path: str = "",
+        cache_max_bytes: int = 256 * 1024**2,
+    ) -> None:
+        self.session = session
+        self.max_bytes = max_bytes
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.chunk_size = chunk_size
+        self.hosts: defaultdict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_host))
+        self.cache = (
+            DiskCache(cache_path, max_bytes=cache_max_bytes, data_suffix=".body", meta_suffix=".json")
+            if cache_path
+            else None
+        )
+        self.downloads = 0
+        self.revalidated = 0
+        self.too_large = 0
+
+    async def fetch(self, url: str) -> bytes | None:
+        """The body of ``url``, None when it isn't there (any status but 200, mudae's removed.png, network errors)."""
+        key = hashlib.sha256(url.encode()).hexdigest()
+        cached = await self.read_cache(key)
+        headers = {}
+        if cached:
+            if cached[1].get("etag"):
+                headers["If-None-Match"] = cached[1]["etag"]
+            if cached[1].get("last_modified"):
+                headers["If-Modified-Since"] = cached[1]["last_modified"]
+
+        try:
+            async with self.hosts[URL(url).host or ""]:
+                # timed once the host semaphore is held, waiting for it isn't the request's latency
+                start = time.perf_counter()
+                async with self.session.get(url, headers=headers, timeout=self.timeout) as response:
+                    metrics.increment("http_responses", target="image_fetch", status=str(response.status))
+                    if response.status == 304 and cached:
+                        self.revalidated += 1
+                        return cached[0]
+                    if response.status != 200 or response.url.name == "removed.png":
+                        return None
+                    body = await self.read_body(url, response)
+                metrics.observe("http_seconds", time.perf_counter() - start, target="image_fetch")
+        except (aiohttp.ClientError, TimeoutError) as error:
+            log.info("failed to fetch %s: %r", url, error)
+            return None
+
+        self.downloads += 1
+        if self.cache is not None and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+            meta = {"url": url, "etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+            await self.cache.put(key, body, json.dumps(meta))
+        return body
+
+    async def read_body(self, url: str, response: aiohttp.ClientResponse) -> bytes:
+        if response.content_length is not None and response.content_length > self.max_bytes:
+            self.too_large += 1
+            raise ImageTooLarge(url, self.max_bytes)
+        # Content-Length can be missing (or lie), so the limit is enforced while reading too
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(self.chunk_size):
+            body += chunk
+            if len(body) > self.max_bytes:
+                self.too_large += 1
+                raise ImageTooLarge(url, self.max_bytes)
+        return bytes(body)
+
+    async def read_cache(self, key: str) -> tuple[bytes, dict[str, str]] | None:
+        cached = await self.cache.get(key) if self.cache is not None else None
+        if cached is None:
+            return None
+        try:
+            return cached[0], json.loads(cached[1])
+        except ValueError:
+            return None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "downloads": self.downloads,
+            "revalidated": self.revalidated,
+            "too_large": self.too_large,
+            "cached": len(self.cache) if self.cache is not None else 0,
+            "cache_bytes": self.cache.stored_bytes if self.cache is not None else 0,
+        }
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+from collections import deque
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+log = logging.getLogger(__name__)
+
+# messages are one json object per line: {"op": ..., "cluster": ..., **data}
+MAX_LINE = 64 * 1024
+
+
+class Relay:
+    """Runs in the cluster launcher, every line a cluster sends is passed on to every other cluster."""
+
+    def __init__(self) -> None:
+        self.clients: set[asyncio.StreamWriter] = set()
+        self.relayed = 0
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_LINE)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.clients.add(writer)
+        try:
+            while line := await reader.readline():
+                for client in self.clients - {writer}:
+                    client.write(line)
+                self.relayed += 1
+        except (ConnectionError, ValueError) as error:  # ValueError: a line over MAX_LINE
+            log.warning("dropping relay client: %r", error)
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+
+class RelayClient:
+    """One cluster's connection to the launcher's relay.
+
+    ``publish`` never waits, messages sent while the relay is unreachable are kept (up to ``backlog``)
+    and go out once it reconnects. ``handlers`` maps an op to the function applying it in this process.
+    """
+
+    def __init__(self, host: str, port: int, cluster: int, *, backlog: int = 10000, retry: float = 5) -> None:
+        self.host = host
+        self.port = port
+        self.cluster = cluster
+        self.retry = retry
+        self.handlers: dict[str, Callable[[dict[str, Any]], None]] = {}
+        self.backlog: deque[bytes] = deque(maxlen=backlog)
+        self.writer: asyncio.StreamWriter | None = None
+        self.task: asyncio.Task[None] | None = None
+        self.received = 0
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self.run())
+
+    def publish(self, op: str, **data: Any) -> None:
+        line = json.dumps({"op": op, "cluster": self.cluster, **data}).encode() + b"\n"
+        if self.writer is None or self.writer.is_closing():
+            self.backlog.append(line)
+        else:
+            self.writer.write(line)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                reader, self.writer = await asyncio.open_connection(self.host, self.port, limit=MAX_LINE)
+                while self.backlog:
+                    self.writer.write(self.backlog.popleft())
+                while line := await reader.readline():
+                    self.dispatch(line)
+            except (OSError, ValueError) as error:
+                log.warning("relay connection lost: %r", error)
+            finally:
+                if self.writer:
+                    self.writer.close()
+                    self.writer = None
+            await asyncio.sleep(self.retry)
+
+    def dispatch(self, line: bytes) -> None:
+        message = json.loads(line)
+        handler = self.handlers.get(message.pop("op"))
+        if handler is None:
+            return
+        self.received += 1
+        try:
+            handler(message)
+        except Exception:
+            log.exception("failed to apply %s", message)
+
+    async def close(self) -> None:
+        if self.task:
+            self.task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.task
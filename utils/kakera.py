@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import ArrayLike, NDArray
+
+
+# hhttps://codepen.io/ifailatgithub/pen/mdrJdgb (outdated)
+# https://codepen.io/xr_/pen/oNaOxxB (updated fork)
+def keys_multiplier(keys: int) -> float:
+    if keys < 1:
+        return 1
+    elif 1 <= keys < 3:
+        return 1 + 0.1 * (keys - 1)
+    elif 3 <= keys < 6:
+        return 1.1 + 0.1 * (keys - 3)
+    elif 6 <= keys < 10:
+        return 1.3 + 0.1 * (keys - 6)
+    else:
+        return 1.6 + 0.05 * (keys - 10)
+
+
+def keys_bonus_value(keys: int) -> int:
+    # the calculator this is ported from also has 10-20, 20-35, 35-60 and 60-300 key brackets, but written
+    # as `10 >= keys > 20` they never matched, so only 300+ keys ever gave a bonus and that's all that's kept
+    return 210 if keys >= 300 else 0
+
+
+def kakera_value(claim_rank: int, like_rank: int, claimed_chars: int, keys: int) -> tuple[int, float, int]:
+    """Base value, key multiplier and kakera value of one character."""
+    avg_rank = (claim_rank + like_rank) / 2
+    claim_multiplier = 1 + claimed_chars / 5500
+    base_value = math.floor((25000 * (avg_rank + 70) ** -0.75 + 20 + keys_bonus_value(keys)) * claim_multiplier + 0.5)
+    return base_value, keys_multiplier(keys), math.floor(base_value * keys_multiplier(keys) + 0.5)
+
+
+def rank_values(rank_sums: NDArray[np.int64]) -> NDArray[np.float64]:
+    import numpy as np
+
+    # the only non linear part, computed once per distinct claim + like rank with python floats so every
+    # result is bit for bit what kakera_value gives (numpy's vectorized pow can be an ulp off)
+    distinct, inverse = np.unique(rank_sums, return_inverse=True)
+    table = np.array([25000 * (rank_sum / 2 + 70) ** -0.75 for rank_sum in distinct.tolist()], dtype=np.float64)
+    return table[inverse.reshape(rank_sums.shape)]
+
+
+def kakera_values(
+    claim_ranks: ArrayLike, like_ranks: ArrayLike, claimed_chars: ArrayLike, keys: ArrayLike
+) -> tuple[NDArray[np.int64], NDArray[np.float64], NDArray[np.int64]]:
+    """``kakera_value`` over arrays (broadcast against each other) in one pass."""
+    # numpy is only needed by the bulk commands, importing it here keeps it out of the bot's startup
+    import numpy as np
+
+    claim_ranks, like_ranks, claimed_chars, keys = np.broadcast_arrays(
+        *(np.asarray(array, dtype=np.int64) for array in (claim_ranks, like_ranks, claimed_chars, keys))
+    )
+    # same branches as keys_multiplier and keys_bonus_value
+    multiplier = np.select(
+        [keys < 1, keys < 3, keys < 6, keys < 10],
+        [1.0, 1 + 0.1 * (keys - 1), 1.1 + 0.1 * (keys - 3), 1.3 + 0.1 * (keys - 6)],
+        1.6 + 0.05 * (keys - 10),
+    )
+    bonus = np.where(keys >= 300, 210, 0)
+    claim_multiplier = 1 + claimed_chars / 5500
+    base_value = np.floor((rank_values(claim_ranks + like_ranks) + 20 + bonus) * claim_multiplier + 0.5).astype(np.int64)
+    return base_value, multiplier, np.floor(base_value * multiplier + 0.5).astype(np.int64)
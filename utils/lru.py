@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import ItemsView
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class ByteLRU(Generic[K, V]):
+    """Entries in least recently used order, with the bytes each one takes and their total.
+
+    The caches decide what an entry's size is (and can change it with ``resize``), ``evict`` drops
+    the oldest entries until the total fits in ``max_bytes`` again.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[K, V] = OrderedDict()
+        self.sizes: dict[K, int] = {}
+        self.stored_bytes = 0
+
+    def __contains__(self, key: K) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def items(self) -> ItemsView[K, V]:
+        # oldest first
+        return self.entries.items()
+
+    def get(self, key: K) -> V | None:
+        if key not in self.entries:
+            return None
+        self.touch(key)
+        return self.entries[key]
+
+    def touch(self, key: K) -> None:
+        self.entries.move_to_end(key)
+
+    def put(self, key: K, value: V, size: int) -> None:
+        self.pop(key)
+        self.entries[key] = value
+        self.sizes[key] = size
+        self.stored_bytes += size
+
+    def resize(self, key: K, size: int) -> None:
+        self.stored_bytes += size - self.sizes[key]
+        self.sizes[key] = size
+
+    def pop(self, key: K) -> V | None:
+        if key not in self.entries:
+            return None
+        self.stored_bytes -= self.sizes.pop(key)
+        return self.entries.pop(key)
+
+    def evict(self) -> list[tuple[K, V]]:
+        # the newest entry is never evicted, it's the one that was just used or added
+        evicted = []
+        while self.stored_bytes > self.max_bytes and len(self.entries) > 1:
+            key, value = self.entries.popitem(last=False)
+            self.stored_bytes -= self.sizes.pop(key)
+            evicted.append((key, value))
+        return evicted
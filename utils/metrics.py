@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import bisect
+import contextlib
+import math
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from aiohttp import web
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+PREFIX = "mudae_regex_"
+# seconds, from a cached prefix lookup to a slow upload
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# the text exposition format prometheus scrapes
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Labels) -> str:
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}" if labels else ""
+
+
+class Histogram:
+    __slots__ = ("count", "counts", "sum")
+
+    def __init__(self) -> None:
+        # counts[i] is how many observations fell in (BUCKETS[i - 1], BUCKETS[i]], the last one is +Inf
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        # linear inside the bucket the quantile lands in, like prometheus' histogram_quantile
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return math.nan
+
+
+class Metrics:
+    """Latency histograms and counters of commands, parsers and i/o, in prometheus' text format.
+
+    Observations can come from worker threads (palettes, parsers), a lock keeps them consistent.
+    Gauges are collected when rendering from the ``stats()`` of the caches and pools that already count things.
+    """
+
+    def __init__(self) -> None:
+        self.histograms: dict[tuple[str, Labels], Histogram] = {}
+        self.counters: dict[tuple[str, Labels], float] = {}
+        self.collectors: dict[str, Callable[[], dict[str, int | float]]] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def register(self, name: str, collector: Callable[[], dict[str, int | float]]) -> None:
+        self.collectors[name] = collector
+
+    def collect(self, name: str) -> dict[str, int | float]:
+        # a reloaded extension registers its collector again, so this always reads the loaded module's objects
+        collector = self.collectors.get(name)
+        return collector() if collector else {}
+
+    def render(self) -> str:
+        lines: list[str] = []
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+
+        previous = None
+        for (name, labels), histogram in histograms:
+            full = f"{PREFIX}{name}"
+            if full != previous:
+                lines.append(f"# TYPE {full} histogram")
+                previous = full
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, "+Inf"), histogram.counts, strict=True):
+                cumulative += count
+                lines.append(f"{full}_bucket{format_labels((*labels, ('le', str(bound))))} {cumulative}")
+            lines.append(f"{full}_sum{format_labels(labels)} {histogram.sum}")
+            lines.append(f"{full}_count{format_labels(labels)} {histogram.count}")
+
+        for (name, labels), value in counters:
+            full = f"{PREFIX}{name}_total"
+            if full != previous:
+                lines.append(f"# TYPE {full} counter")
+                previous = full
+            lines.append(f"{full}{format_labels(labels)} {value}")
+
+        for name, collector in sorted(self.collectors.items()):
+            for key, value in collector().items():
+                full = f"{PREFIX}{name}_{key}"
+                lines.append(f"# TYPE {full} gauge")
+                lines.append(f"{full} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> list[str]:
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        rows = [
+            f"{name}{format_labels(labels)} n={histogram.count} mean={histogram.sum / histogram.count * 1000:.1f}ms"
+            f" p50={histogram.quantile(0.5) * 1000:.1f}ms p95={histogram.quantile(0.95) * 1000:.1f}ms"
+            for (name, labels), histogram in histograms
+        ]
+        rows.extend(f"{name}{format_labels(labels)} {value:g}" for (name, labels), value in counters)
+        return rows
+
+
+metrics = Metrics()
+
+
+async def serve(host: str, port: int) -> web.AppRunner:
+    """Serves ``metrics`` on ``GET /metrics`` for prometheus to scrape, the runner is cleaned up on close."""
+
+    async def handler(request: web.Request) -> web.Response:
+        return web.Response(body=metrics.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
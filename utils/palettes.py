@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import TYPE_CHECKING, Literal
+
+from utils.diskcache import DiskCache
+from utils.lru import ByteLRU
+
+if TYPE_CHECKING:
+    from io import BytesIO
+
+    import numpy as np
+
+PaletteMode = Literal["full", "fast"]
+
+
+def load_pixels(image: BytesIO, max_pixels: int) -> np.ndarray:
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(image) as img:
+        scale = math.sqrt(max_pixels / (img.width * img.height))
+        if scale < 1:
+            size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+            # jpegs are decoded at 1/2, 1/4 or 1/8 scale straight away, everything else is resized after decoding.
+            # nearest samples pixels instead of blending them, cheaper and it doesn't invent colours
+            img.draft("RGB", size)
+            img.thumbnail(size, Image.Resampling.NEAREST)
+        return np.asarray(img.convert("RGBA"), dtype=np.uint8)
+
+
+def extract_palette(
+    image: BytesIO, mode: PaletteMode = "full", max_pixels: int = 160000, color_count: int = 25
+) -> list[tuple[int, int, int]]:
+    # imported with the first image instead of at startup, together with numpy and PIL they take a while
+    import fast_colorthief  # type: ignore
+
+    # full runs the median cut over every pixel, fast over at most max_pixels of a downscaled copy
+    if mode == "fast":
+        return fast_colorthief.get_palette(load_pixels(image, max_pixels), color_count=color_count, quality=1)
+    return fast_colorthief.get_palette(image, color_count=color_count, quality=1)
+
+
+def content_key(image: bytes, mode: PaletteMode = "full", max_pixels: int = 160000) -> str:
+    # the same mudae image comes from different urls (and attachments), so entries are keyed by what was downloaded.
+    # each mode gives slightly different palettes, they're cached separately
+    digest = hashlib.blake2b(image, digest_size=16).hexdigest()
+    return f"{digest}-full" if mode == "full" else f"{digest}-fast{max_pixels}"
+
+
+class PaletteCache:
+    """Palettes and rendered ``Colors.png`` of the images the ``ec`` command has processed.
+
+    Entries are kept in least recently used order and the oldest ones are evicted once the stored
+    bytes go over ``max_bytes``. With a ``disk_path`` entries are also written there (bounded by
+    ``disk_max_bytes``, least recently used first) and looked up on a memory miss, so they survive restarts.
+    """
+
+    def __init__(self, *, max_bytes: int = 16 * 1024**2, disk_path: str = "", disk_max_bytes: int = 256 * 1024**2) -> None:
+        self.entries: ByteLRU[str, tuple[list[str], bytes]] = ByteLRU(max_bytes)
+        self.disk = (
+            DiskCache(disk_path, max_bytes=disk_max_bytes, data_suffix=".png", meta_suffix=".txt") if disk_path else None
+        )
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def entry_size(palette: list[str], png: bytes) -> int:
+        return len(png) + sum(len(color) for color in palette)
+
+    def get(self, key: str) -> tuple[list[str], bytes] | None:
+        return self.entries.get(key)
+
+    def put(self, key: str, palette: list[str], png: bytes) -> None:
+        if key in self.entries:
+            self.entries.touch(key)
+            return
+        self.entries.put(key, (palette, png), self.entry_size(palette, png))
+        self.evictions += len(self.entries.evict())
+
+    async def fetch(self, key: str) -> tuple[list[str], bytes] | None:
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        stored = await self.disk.get(key) if self.disk is not None else None
+        if stored is not None:
+            png, palette = stored
+            entry = (palette.split(), png)
+            self.disk_hits += 1
+            self.put(key, *entry)
+            return entry
+        self.misses += 1
+        return None
+
+    async def store(self, key: str, palette: list[str], png: bytes) -> None:
+        self.put(key, palette, png)
+        if self.disk is not None:
+            await self.disk.put(key, png, "\n".join(palette))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "stored_bytes": self.entries.stored_bytes,
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+            "disk_bytes": self.disk.stored_bytes if self.disk is not None else 0,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
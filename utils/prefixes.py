@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+def matcher(prefixes: Iterable[str]) -> tuple[str, ...]:
+    # discord.py uses the first prefix that matches, longest first so "!" doesn't shadow "!!".
+    # the tuple goes straight to str.startswith, which checks every prefix without building anything
+    return tuple(sorted(set(prefixes), key=lambda prefix: (-len(prefix), prefix)))
+
+
+class PrefixCache:
+    """Guild prefixes in least recently used order, bounded to ``max_size`` guilds.
+
+    Every guild maps to a ``matcher`` tuple of its prefixes. Guilds using only the default prefix
+    have no rows in the database. While every guild with rows fits in the cache a miss means the
+    guild uses the default prefix, once guilds start getting evicted a miss has to be looked up
+    and guilds without rows are cached with the default prefix.
+    """
+
+    def __init__(self, default: str, max_size: int = 10000) -> None:
+        self.default = matcher((default,))
+        self.max_size = max_size
+        self.prefixes: OrderedDict[int, tuple[str, ...]] = OrderedDict()
+        self.complete = False
+
+    def __len__(self) -> int:
+        return len(self.prefixes)
+
+    def load(self, rows: list[tuple[int, tuple[str, ...]]]) -> None:
+        self.prefixes.clear()
+        self.complete = True
+        for guild_id, prefixes in rows:
+            self.set(guild_id, prefixes)
+
+    def get(self, guild_id: int) -> tuple[str, ...] | None:
+        prefixes = self.prefixes.get(guild_id)
+        if prefixes is not None:
+            self.prefixes.move_to_end(guild_id)
+            return prefixes
+        return self.default if self.complete else None
+
+    def set(self, guild_id: int, prefixes: Iterable[str]) -> None:
+        prefixes = matcher(prefixes) or self.default
+        if self.complete and prefixes == self.default:
+            self.prefixes.pop(guild_id, None)
+            return
+        self.prefixes[guild_id] = prefixes
+        self.prefixes.move_to_end(guild_id)
+        if len(self.prefixes) > self.max_size:
+            self.prefixes.popitem(last=False)
+            self.complete = False
+
+    def invalidate(self, guild_id: int) -> None:
+        self.prefixes.pop(guild_id, None)
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from typing import Any
+
+import discord
+
+
+def cache_options(profile: str) -> dict[str, Any]:
+    if profile != "lean":
+        return {"intents": discord.Intents.all()}
+
+    # everything the cogs use: prefix commands and mudae embeds in guilds and dms, and guild join/leave.
+    # no presences, no member list and no message cache (tracked mudae pages come from raw edit events)
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+    intents.dm_messages = True
+    intents.message_content = True
+    return {
+        "intents": intents,
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "max_messages": None,
+        "chunk_guilds_at_startup": False,
+    }
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple
+
+import discord
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+def cached_user_count(client: discord.Client) -> int:
+    # Client.users copies the whole user cache into a list, the length of the cache itself is constant time.
+    # discord.py has no public accessor for it
+    return len(client._connection._users)
+
+
+class GuildCounts(NamedTuple):
+    members: int
+    text: int
+    voice: int
+
+
+EMPTY = GuildCounts(0, 0, 0)
+
+
+def count_guild(guild: discord.Guild) -> GuildCounts:
+    # unavailable guilds count as a guild but their members and channels aren't known
+    if guild.unavailable:
+        return EMPTY
+    text = voice = 0
+    for channel in guild.channels:
+        if isinstance(channel, discord.TextChannel):
+            text += 1
+        elif isinstance(channel, discord.VoiceChannel):
+            voice += 1
+    return GuildCounts(guild.member_count or 0, text, voice)
+
+
+class GuildStats:
+    """Members and channels of every guild, summed as they change instead of on every ``about``.
+
+    Each guild keeps the counts it contributed, an event recounts only the guild it happened in
+    (one channel list at worst) and moves the totals by the difference.
+    """
+
+    def __init__(self) -> None:
+        self.guilds: dict[int, GuildCounts] = {}
+        self.members = 0
+        self.text = 0
+        self.voice = 0
+
+    def rebuild(self, guilds: Iterable[discord.Guild]) -> None:
+        # the gateway sends every guild again after a fresh (not resumed) connection
+        self.guilds.clear()
+        self.members = self.text = self.voice = 0
+        for guild in guilds:
+            self.update(guild)
+
+    def update(self, guild: discord.Guild) -> None:
+        self.apply(guild.id, count_guild(guild))
+
+    def remove(self, guild_id: int) -> None:
+        self.apply(guild_id, None)
+
+    def update_members(self, guild: discord.Guild) -> None:
+        # discord.py already moved member_count when the member events fire, the channels didn't change
+        old = self.guilds.get(guild.id)
+        if old is not None and not guild.unavailable:
+            self.apply(guild.id, old._replace(members=guild.member_count or 0))
+
+    def apply(self, guild_id: int, counts: GuildCounts | None) -> None:
+        old = self.guilds.pop(guild_id, EMPTY)
+        if counts is not None:
+            self.guilds[guild_id] = counts
+        new = counts or EMPTY
+        self.members += new.members - old.members
+        self.text += new.text - old.text
+        self.voice += new.voice - old.voice
+
+    def __len__(self) -> int:
+        return len(self.guilds)
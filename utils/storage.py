@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import aiofiles
+import asqlite
+
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    import sqlite3
+
+log = logging.getLogger(__name__)
+
+MIGRATIONS = Path("migrations")
+
+# the same query text every time, so sqlite3 keeps reusing its prepared statement
+SELECT_PREFIXES = "SELECT guild_id, prefix FROM prefixes"
+SELECT_PREFIX = "SELECT prefix FROM prefixes WHERE guild_id = ?"
+INSERT_PREFIX = "INSERT OR IGNORE INTO prefixes (guild_id, prefix) VALUES (?, ?)"
+DELETE_PREFIXES = "DELETE FROM prefixes WHERE guild_id = ?"
+
+
+class Storage:
+    """SQLite access for the bot.
+
+    Writes are write-behind: ``set_prefixes``/``delete_prefixes`` only record the latest prefixes per guild
+    and a background task writes everything recorded during ``flush_interval`` in one transaction.
+    """
+
+    def __init__(self, pool: asqlite.Pool, *, flush_interval: float = 0.5, max_batch: int = 500) -> None:
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        # guild id -> every prefix the guild has, empty to delete its rows
+        self.pending: dict[int, tuple[str, ...]] = {}
+        self.wakeup = asyncio.Event()
+        self.batch_full = asyncio.Event()
+        self.writer: asyncio.Task[None] | None = None
+        self.flushes = 0
+        self.written = 0
+
+    @classmethod
+    async def open(
+        cls,
+        database: str = "database.db",
+        *,
+        synchronous: str = "NORMAL",
+        cached_statements: int = 256,
+        flush_interval: float = 0.5,
+        max_batch: int = 500,
+    ) -> Storage:
+        if not re.fullmatch(r"OFF|NORMAL|FULL|EXTRA", synchronous, flags=re.I):
+            raise ValueError(f"invalid synchronous level {synchronous!r}")
+
+        # asqlite already enables WAL, with it NORMAL only risks the last transactions on power loss, not corruption
+        def init(conn: sqlite3.Connection) -> None:
+            conn.execute(f"PRAGMA synchronous = {synchronous}")
+
+        pool = await asqlite.create_pool(database, init=init, cached_statements=cached_statements)
+        storage = cls(pool, flush_interval=flush_interval, max_batch=max_batch)
+        await storage.migrate()
+        storage.writer = asyncio.create_task(storage.write_behind())
+        return storage
+
+    async def migrate(self) -> None:
+        # migrations/NNNN_name.sql, each one runs once in its own transaction and bumps user_version
+        async with self.pool.acquire() as conn:
+            cursor = await conn.execute("PRAGMA user_version")
+            version: int = (await cursor.fetchone())[0]
+            for path in sorted(MIGRATIONS.glob("*.sql")):
+                number = int(path.name.split("_", 1)[0])
+                if number <= version:
+                    continue
+                async with aiofiles.open(path) as fp:
+                    script = await fp.read()
+                await conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {number};\nCOMMIT;")
+                log.info("applied migration %s", path.name)
+
+    async def fetch_prefixes(self) -> list[tuple[int, tuple[str, ...]]]:
+        async with self.pool.acquire() as conn:
+            cursor = await conn.execute(SELECT_PREFIXES)
+            rows = await cursor.fetchall()
+        prefixes: dict[int, list[str]] = {}
+        for row in rows:
+            prefixes.setdefault(row["guild_id"], []).append(row["prefix"])
+        # writes that aren't flushed yet win over what's in the database
+        guilds = {guild_id: tuple(guild_prefixes) for guild_id, guild_prefixes in prefixes.items()}
+        guilds.update(self.pending)
+        return [(guild_id, guild_prefixes) for guild_id, guild_prefixes in guilds.items() if guild_prefixes]
+
+    async def fetch_prefix(self, guild_id: int) -> tuple[str, ...]:
+        if guild_id in self.pending:
+            return self.pending[guild_id]
+        with metrics.timer("sqlite_seconds", query="fetch_prefix"):
+            async with self.pool.acquire() as conn:
+                cursor = await conn.execute(SELECT_PREFIX, (guild_id,))
+                rows = await cursor.fetchall()
+        return tuple(row["prefix"] for row in rows)
+
+    def set_prefixes(self, guild_id: int, prefixes: tuple[str, ...]) -> None:
+        self.queue(guild_id, prefixes)
+
+    def delete_prefixes(self, guild_id: int) -> None:
+        self.queue(guild_id, ())
+
+    def queue(self, guild_id: int, prefixes: tuple[str, ...]) -> None:
+        self.pending[guild_id] = prefixes
+        self.wakeup.set()
+        if len(self.pending) >= self.max_batch:
+            self.batch_full.set()
+
+    async def write_behind(self) -> None:
+        while True:
+            await self.wakeup.wait()
+            # let a burst (a join storm, a prefix spam) pile up unless the batch is already full
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.batch_full.wait(), timeout=self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                log.exception("failed to flush %s pending writes", len(self.pending))
+
+    async def flush(self) -> None:
+        self.wakeup.clear()
+        self.batch_full.clear()
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        # every pending guild is rewritten whole: its old rows go, then one row per prefix
+        deletes = [(guild_id,) for guild_id in pending]
+        inserts = [(guild_id, prefix) for guild_id, prefixes in pending.items() for prefix in prefixes]
+        try:
+            with metrics.timer("sqlite_seconds", query="flush"):
+                async with self.pool.acquire() as conn, conn.transaction():
+                    await conn.executemany(DELETE_PREFIXES, deletes)
+                    if inserts:
+                        await conn.executemany(INSERT_PREFIX, inserts)
+        except BaseException:
+            # put the writes back unless a newer value was queued in the meantime
+            self.pending = pending | self.pending
+            raise
+        self.flushes += 1
+        self.written += len(pending)
+
+    async def close(self) -> None:
+        if self.writer:
+            self.writer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.writer
+        await self.flush()
+        await self.pool.close()
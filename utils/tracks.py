@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import logging
+import time
+import zlib
+
+from utils.lru import ByteLRU
+
+log = logging.getLogger(__name__)
+
+# descriptions are joined with a character mudae never sends before being compressed
+SEPARATOR = "\x00"
+
+
+class TrackedMessage:
+    __slots__ = ("compressed", "count", "hashes", "last_used", "pages", "size")
+
+    def __init__(self, description: str) -> None:
+        self.pages: list[str] | None = [description]
+        # duplicate edits are caught without comparing (or decompressing) the stored pages
+        self.hashes = {hash(description)}
+        self.compressed: bytes | None = None
+        self.count = 1
+        self.size = len(description.encode())
+        self.last_used = time.monotonic()
+
+    @property
+    def stored_size(self) -> int:
+        return len(self.compressed) if self.compressed is not None else self.size
+
+    def compress(self) -> None:
+        if self.pages is not None:
+            self.compressed = zlib.compress(SEPARATOR.join(self.pages).encode())
+            self.pages = None
+
+    def decompress(self) -> list[str]:
+        if self.pages is None:
+            self.pages = zlib.decompress(self.compressed).decode().split(SEPARATOR)  # type: ignore
+            self.compressed = None
+        self.last_used = time.monotonic()
+        return self.pages
+
+
+class TrackStore:
+    """Embed descriptions of the mudae messages RowButtons views are following.
+
+    Entries are kept in least recently used order, the oldest ones are evicted once the stored
+    bytes go over ``max_bytes`` and entries nobody touched for ``idle_seconds`` are kept zlib compressed.
+    """
+
+    def __init__(self, *, max_bytes: int = 32 * 1024**2, idle_seconds: float = 60) -> None:
+        self.idle_seconds = idle_seconds
+        # sized by their stored (possibly compressed) bytes
+        self.messages: ByteLRU[int, TrackedMessage] = ByteLRU(max_bytes)
+        # running totals over every entry, moved by account() so stats() doesn't walk the entries
+        self.raw_bytes = 0
+        self.compressed = 0
+        self.evictions = 0
+
+    def __contains__(self, msg_id: int) -> bool:
+        return msg_id in self.messages
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def account(self, message: TrackedMessage, sign: int) -> None:
+        # sign is 1 when an entry (or its new state) is added to the totals, -1 when it's taken out
+        self.raw_bytes += sign * message.size
+        self.compressed += sign * (message.pages is None)
+
+    def use(self, msg_id: int) -> TrackedMessage:
+        message = self.messages.entries[msg_id]
+        self.messages.touch(msg_id)
+        self.account(message, -1)
+        message.decompress()
+        self.account(message, 1)
+        self.messages.resize(msg_id, message.stored_size)
+        return message
+
+    def track(self, msg_id: int, description: str) -> None:
+        if msg_id in self.messages:
+            return
+        message = TrackedMessage(description)
+        self.messages.put(msg_id, message, message.stored_size)
+        self.account(message, 1)
+        self.maintain()
+
+    def append(self, msg_id: int, description: str) -> bool:
+        message = self.messages.entries.get(msg_id)
+        if message is None or hash(description) in message.hashes:
+            return False
+        message = self.use(msg_id)
+        self.account(message, -1)
+        message.hashes.add(hash(description))
+        message.pages.append(description)  # type: ignore
+        message.count += 1
+        message.size += len(description.encode())
+        self.account(message, 1)
+        self.messages.resize(msg_id, message.stored_size)
+        self.maintain()
+        return True
+
+    def count(self, msg_id: int) -> int:
+        message = self.messages.entries.get(msg_id)
+        return message.count if message else 0
+
+    def size(self, msg_id: int) -> int:
+        message = self.messages.entries.get(msg_id)
+        return message.size if message else 0
+
+    def pages(self, msg_id: int, start: int = 0) -> list[str]:
+        if msg_id not in self.messages:
+            return []
+        pages = self.use(msg_id).pages[start:]  # type: ignore
+        self.maintain()
+        return pages
+
+    def remove(self, msg_id: int) -> None:
+        message = self.messages.pop(msg_id)
+        if message:
+            self.account(message, -1)
+
+    def maintain(self) -> None:
+        # least recently used first, so every idle entry comes before the first one that isn't
+        now = time.monotonic()
+        for msg_id, message in self.messages.items():
+            if now - message.last_used < self.idle_seconds:
+                break
+            if message.pages is not None:
+                self.account(message, -1)
+                message.compress()
+                self.account(message, 1)
+                self.messages.resize(msg_id, message.stored_size)
+
+        for msg_id, message in self.messages.evict():
+            self.account(message, -1)
+            self.evictions += 1
+            # entries are removed when their view times out, so an evicted one still has a view following it:
+            # the view keeps the pages it parsed but won't see the ones mudae adds from now on
+            log.warning(
+                "evicted tracked message %s (%d pages, used %.0fs ago), raise [tracks] max_bytes if views stop updating",
+                msg_id,
+                message.count,
+                now - message.last_used,
+            )
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self.messages),
+            "compressed": self.compressed,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.messages.stored_bytes,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from aiohttp import FormData
+from aiohttp.payload import AsyncIterablePayload
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable
+
+    import aiohttp
+    import discord
+
+
+class ByteBudget:
+    """Bytes every upload together may hold in memory at once, uploads wait for their share in order."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.used = 0
+        self.waiters: deque[tuple[int, asyncio.Future[None]]] = deque()
+
+    async def acquire(self, size: int) -> int:
+        # a chunk bigger than the whole budget would never fit, it waits for everything else instead
+        size = min(size, self.limit)
+        if not self.waiters and self.used + size <= self.limit:
+            self.used += size
+            return size
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((size, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(size)  # it was granted just before the cancellation landed
+            else:
+                with contextlib.suppress(ValueError):
+                    self.waiters.remove((size, future))
+                self.release(0)  # the next waiter may fit now that this one is out of the way
+            raise
+        return size
+
+    def release(self, size: int) -> None:
+        self.used -= size
+        while self.waiters and self.used + self.waiters[0][0] <= self.limit:
+            size, future = self.waiters.popleft()
+            if future.cancelled():
+                continue
+            self.used += size
+            future.set_result(None)
+
+
+class UploadProgress:
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.sent = 0
+        self.start = time.monotonic()
+
+    def render(self) -> str:
+        elapsed = max(time.monotonic() - self.start, 1e-9)
+        return (
+            f"uploading {self.sent / 1024**2:.1f}/{self.total / 1024**2:.1f}MB"
+            f" ({self.sent / self.total:.0%}, {self.sent / elapsed / 1024**2:.1f}MB/s)"
+        )
+
+    async def report(self, message: discord.Message, interval: float = 2) -> None:
+        # edited on an interval instead of per chunk, message edits are rate limited
+        while True:
+            await asyncio.sleep(interval)
+            await message.edit(content=self.render())
+
+
+async def stream(
+    session: aiohttp.ClientSession, url: str, budget: ByteBudget, progress: UploadProgress, chunk_size: int
+) -> AsyncIterator[bytes]:
+    async with session.get(url, raise_for_status=True) as response:
+        while True:
+            size = await budget.acquire(chunk_size)
+            try:
+                chunk = await response.content.read(size)
+                if not chunk:
+                    return
+                # the consumer writes the chunk to the upload before resuming the generator,
+                # so its share of the budget is only given back once it left memory
+                yield chunk
+                progress.sent += len(chunk)
+            finally:
+                budget.release(size)
+
+
+class StreamPayload(AsyncIterablePayload):
+    # the attachment size is known up front, with it the multipart body gets a Content-Length instead of being chunked
+    def __init__(self, value: AsyncIterator[bytes], size: int, *args: Any, **kwargs: Any) -> None:
+        super().__init__(value, *args, **kwargs)
+        self._size = size
+
+
+class UploadFile(NamedTuple):
+    url: str
+    size: int
+    filename: str
+    content_type: str
+
+
+def upload_form(
+    session: aiohttp.ClientSession,
+    files: Iterable[UploadFile],
+    budget: ByteBudget,
+    progress: UploadProgress,
+    chunk_size: int,
+) -> FormData:
+    # the files are piped from their urls (discord's cdn) into the upload instead of being read into memory first
+    data = FormData()
+    data.add_field("anonymous", "1")
+    data.add_field("nsfw", "true")
+    for file in files:
+        data.add_field(
+            "images[]",
+            StreamPayload(
+                stream(session, file.url, budget, progress, chunk_size), file.size, content_type=file.content_type
+            ),
+            filename=file.filename,
+        )
+    return data